@@ -4,10 +4,49 @@ from dotenv import load_dotenv
 load_dotenv()
 
 OPENSEA_API_KEY = os.getenv('OPENSEA_API_KEY')
-OPENSEA_API_URL = 'https://api.opensea.io/v2'
+OPENSEA_API_URL = os.getenv('OPENSEA_API_URL', 'https://api.opensea.io/v2')
 
-# Production
-LOOTEX_API_URL = 'https://v3-api.lootex.io/api/v3'
+# Production (override with LOOTEX_API_URL, e.g. to point at tests/mock_server.py)
+LOOTEX_API_URL = os.getenv('LOOTEX_API_URL', 'https://v3-api.lootex.io/api/v3')
 
 # Preview
-# LOOTEX_API_URL = 'https://dex-v3-api-aws.lootex.dev/api/v3'
\ No newline at end of file
+# LOOTEX_API_URL = 'https://dex-v3-api-aws.lootex.dev/api/v3'
+
+# Number of /orders/history pages fetched in parallel once the page count is known
+LOOTEX_MAX_WORKERS = int(os.getenv('LOOTEX_MAX_WORKERS', '4'))
+
+# Bounded time ranges are split into this many windows crawled concurrently (1 = off)
+HISTORY_WINDOW_SHARDS = int(os.getenv('HISTORY_WINDOW_SHARDS', '1'))
+
+# Shared HTTP connection pool (per client) and request timeouts in seconds
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+
+# Default cap on in-flight requests for the asyncio clients
+ASYNC_MAX_CONCURRENCY = int(os.getenv('ASYNC_MAX_CONCURRENCY', '50'))
+
+# On-disk response cache; disabled unless a path is configured
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '600'))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+# Events older than this (relative to when they were fetched) are treated as final
+RESPONSE_CACHE_SETTLE_SECONDS = float(os.getenv('RESPONSE_CACHE_SETTLE_SECONDS', '3600'))
+
+# Incremental sync: per-token watermarks and merged raw events
+SYNC_STORE_PATH = os.getenv('SYNC_STORE_PATH', 'sync_store.db')
+# Re-fetch this many seconds before the watermark to catch late or same-second events
+SYNC_OVERLAP_SECONDS = float(os.getenv('SYNC_OVERLAP_SECONDS', '300'))
+
+# Indexed store of normalized events from both marketplaces
+EVENT_STORE_PATH = os.getenv('EVENT_STORE_PATH', 'events.db')
+
+# Client-side rate limits in requests per second, per host
+LOOTEX_RATE_LIMIT = float(os.getenv('LOOTEX_RATE_LIMIT', '10'))
+OPENSEA_RATE_LIMIT = float(os.getenv('OPENSEA_RATE_LIMIT', '4'))
+DEFAULT_RATE_LIMIT = float(os.getenv('DEFAULT_RATE_LIMIT', '10'))
+
+# Retries for 429/5xx responses and connection errors, with jittered exponential backoff
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.5'))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '30'))
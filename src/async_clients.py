@@ -0,0 +1,183 @@
+import json
+import time
+import asyncio
+import aiohttp
+from config.settings import (
+    LOOTEX_API_URL, LOOTEX_MAX_WORKERS, OPENSEA_API_KEY, OPENSEA_API_URL,
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_MAX_RETRIES, ASYNC_MAX_CONCURRENCY
+)
+from src.http_session import MarketplaceAPIError, RETRY_STATUSES, parse_retry_after, retry_delay
+from src.rate_limit import get_rate_limiter
+from src.lootex_client import (
+    HISTORY_HEADERS, build_history_params, parse_history_page, apply_page_results, merge_history_pages
+)
+from src.opensea_client import build_events_params
+
+class AsyncClientBase:
+    # Pass the same semaphore to several clients to cap the number of
+    # requests in flight across all of them, e.g. one budget for every
+    # Lootex and OpenSea fetch driven by a single event loop.
+    def __init__(self, session=None, semaphore=None, pool_size=None, timeout=None, max_retries=None, metrics=None):
+        self._owns_session = session is None
+        self.max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.metrics = metrics
+        self.session = session
+        self.semaphore = semaphore or asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+        self.pool_size = pool_size or HTTP_POOL_SIZE
+        self.timeout = timeout or aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+
+    def _get_session(self):
+        # aiohttp sessions must be created inside the running event loop.
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit_per_host=self.pool_size)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _get_json(self, url, headers, params=None, endpoint=None):
+        # Same policy as SessionMixin._get: per-host rate limiting, retries on
+        # 429/5xx and dropped connections, MarketplaceAPIError when exhausted.
+        # requests silently drops None headers (e.g. an unset API key);
+        # aiohttp refuses to serialize them.
+        headers = {key: value for key, value in headers.items() if value is not None}
+        limiter = get_rate_limiter(url)
+        metrics = self.metrics
+
+        for attempt in range(self.max_retries + 1):
+            await limiter.acquire_async()
+            try:
+                async with self.semaphore:
+                    started = time.perf_counter()
+                    async with self._get_session().get(url, headers=headers, params=params) as response:
+                        if response.status == 200:
+                            limiter.on_success()
+                            if metrics is None:
+                                return await response.json(content_type=None)
+                            body = await response.read()
+                            metrics.record_response(endpoint, time.perf_counter() - started, 200)
+                            decode_started = time.perf_counter()
+                            data = json.loads(body)
+                            metrics.record_body(endpoint, len(body), time.perf_counter() - decode_started)
+                            return data
+                        status = response.status
+                        body = await response.text()
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        response_url = str(response.url)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if metrics is not None:
+                    metrics.record_response(endpoint, time.perf_counter() - started, None)
+                if attempt == self.max_retries:
+                    raise
+                if metrics is not None:
+                    metrics.record_retry(endpoint)
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+
+            if metrics is not None:
+                metrics.record_response(endpoint, time.perf_counter() - started, status)
+            if status == 429:
+                limiter.on_throttled()
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                raise MarketplaceAPIError(status, body, response_url)
+            if metrics is not None:
+                metrics.record_retry(endpoint)
+            await asyncio.sleep(retry_delay(attempt, retry_after))
+
+    def _record_page(self, endpoint, events):
+        if self.metrics is not None:
+            self.metrics.record_page(endpoint, events)
+
+class AsyncLootexClient(AsyncClientBase):
+    def __init__(self, max_workers=None, session=None, semaphore=None, pool_size=None, timeout=None, max_retries=None,
+                 metrics=None):
+        self.base_url = LOOTEX_API_URL
+        self.max_workers = max_workers or LOOTEX_MAX_WORKERS
+        super().__init__(session, semaphore, max(pool_size or HTTP_POOL_SIZE, self.max_workers), timeout, max_retries,
+                         metrics)
+
+    async def _fetch_page(self, endpoint, params, page):
+        data = await self._get_json(endpoint, HISTORY_HEADERS, {**params, 'page': page}, endpoint='lootex.history')
+        events, total_pages = parse_history_page(data)
+        self._record_page('lootex.history', len(events))
+        return events, total_pages
+
+    async def get_nft_events(self, chain_id, contract_address, token_id, limit=30, page=1, start_time=None, end_time=None):
+        endpoint = f"{self.base_url}/orders/history"
+        params = build_history_params(chain_id, contract_address, token_id, limit, start_time, end_time)
+
+        first = await self._fetch_page(endpoint, params, 1)
+        if first is None:
+            return []
+
+        events, total_pages = first
+        pages = {1: events}
+        last_page = 1 if len(events) < limit else total_pages
+        next_page = 2
+
+        # Same crawl as LootexClient: later pages go out in rounds of at most
+        # max_workers, on top of the shared semaphore.
+        while next_page <= last_page:
+            batch = range(next_page, min(last_page, next_page + self.max_workers - 1) + 1)
+            results = await asyncio.gather(*(self._fetch_page(endpoint, params, p) for p in batch))
+            last_page, stop = apply_page_results(batch, results, pages, last_page, limit)
+            next_page = batch.stop
+            if stop:
+                break
+
+        return merge_history_pages(pages, last_page)
+
+    async def get_filtered_events(self, chain_id, contract_address, token_id, start_time, end_time, limit=30):
+        return await self.get_nft_events(chain_id, contract_address, token_id, limit, start_time=start_time, end_time=end_time)
+
+class AsyncOpenSeaClient(AsyncClientBase):
+    def __init__(self, session=None, semaphore=None, pool_size=None, timeout=None, max_retries=None, metrics=None):
+        self.api_key = OPENSEA_API_KEY
+        self.base_url = OPENSEA_API_URL
+        super().__init__(session, semaphore, pool_size, timeout, max_retries, metrics)
+
+    async def get_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50, next=None):
+        url = f"{self.base_url}/events/chain/{chain}/contract/{contract_address}/nfts/{token_id}"
+        headers = {"accept": "application/json", "X-API-KEY": self.api_key}
+        params = build_events_params(event_types, after, before, limit, next)
+
+        # aiohttp wants repeated keys as (key, value) pairs.
+        query = []
+        for key, value in params.items():
+            if isinstance(value, (list, tuple)):
+                query.extend((key, str(v)) for v in value)
+            else:
+                query.append((key, str(value)))
+
+        data = await self._get_json(url, headers, query, endpoint='opensea.events')
+        self._record_page('opensea.events', len(data.get('asset_events', [])))
+        return data
+
+    async def iter_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50, max_pages=None, max_events=None):
+        cursor = None
+        pages = 0
+        yielded = 0
+
+        while True:
+            data = await self.get_nft_events(chain, contract_address, token_id, event_types=event_types,
+                                             after=after, before=before, limit=limit, next=cursor)
+            pages += 1
+
+            for event in data.get('asset_events', []):
+                if max_events is not None and yielded >= max_events:
+                    return
+                yield event
+                yielded += 1
+
+            cursor = data.get('next')
+            if not cursor or (max_pages is not None and pages >= max_pages):
+                return
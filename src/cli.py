@@ -0,0 +1,125 @@
+import sys
+import argparse
+
+# Non-interactive comparison of one token:
+#
+#   python -m src.cli --chain 137 --contract 0x... --token 1 [--start-time ...] [--quiet] [--check]
+#
+# Only argparse is imported up front. config.settings (which reads .env),
+# src.compare and the clients (and with them requests) are imported once
+# the arguments are known, so --help and usage errors return immediately
+# and --from-store runs never load the HTTP stack. tests/benchmark.py
+# cli_startup checks startup time against CLI_STARTUP_BUDGET_MS.
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m src.cli',
+                                     description="Compare Lootex and OpenSea events for one token")
+    parser.add_argument('--chain', required=True, help="Chain ID or name (e.g., 137, matic, 8453, base)")
+    parser.add_argument('--contract', required=True, help="Contract address")
+    parser.add_argument('--token', required=True, help="Token ID")
+    parser.add_argument('--start-time', help="YYYY-MM-DD HH:MM:SS")
+    parser.add_argument('--end-time', help="YYYY-MM-DD HH:MM:SS")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="Print only the counts per event type instead of every unmatched event")
+    parser.add_argument('--output', help="Write unmatched events and field differences to this .jsonl or .csv file")
+    parser.add_argument('--check', action='store_true',
+                        help="Exit with status 1 if any event is unmatched or has differing fields. OpenSea-only "
+                             "sales are not counted: OpenSea reports every transfer, Lootex only sales")
+    parser.add_argument('--price-decimals', type=int, default=6, help="Decimals prices are rounded to before comparing")
+    parser.add_argument('--timestamp-skew', type=float, default=0, help="Seconds two event times may differ by")
+    parser.add_argument('--timestamp-offset', type=float, default=0, help="Seconds added to OpenSea times before comparing")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the on-disk response cache")
+    parser.add_argument('--window-shards', type=int, default=None,
+                        help="Split a bounded time range into this many windows fetched concurrently")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Merge-join both histories as pages arrive, holding only --stream-window of events")
+    parser.add_argument('--stream-window', type=float, default=None,
+                        help="Seconds an unmatched event waits for its counterpart with --streaming (default: STREAM_WINDOW_SECONDS, one day)")
+    parser.add_argument('--event-store', nargs='?', const='', default=None,
+                        help="Save normalized events to this indexed store (default path: EVENT_STORE_PATH)")
+    parser.add_argument('--from-store', action='store_true',
+                        help="Compare the events already in --event-store instead of fetching")
+    parser.add_argument('--metrics', action='store_true', help="Print request, page and stage timings at the end")
+    args = parser.parse_args(argv)
+    if args.from_store and args.event_store is None:
+        parser.error("--from-store requires --event-store")
+    if args.streaming and (args.event_store is not None or args.window_shards is not None):
+        parser.error("--streaming cannot be combined with --event-store or --window-shards")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from src.reconcile import STREAM_WINDOW_SECONDS, Tolerances
+    from src.result_sink import MultiSink, SummaryReport, open_sink
+    from src.compare import compare_token, compare_token_streaming
+
+    tolerances = Tolerances(args.price_decimals, args.timestamp_offset, args.timestamp_skew)
+    metrics = None
+    if args.metrics:
+        from src.metrics import Metrics
+        metrics = Metrics()
+    event_store = None
+    if args.event_store is not None:
+        from src.event_store import EventStore
+        event_store = EventStore(args.event_store)
+
+    lootex_client = opensea_client = None
+    if not args.from_store:
+        from src.lootex_client import LootexClient
+        from src.opensea_client import OpenSeaClient
+        # A streamed crawl is never cached or split into windows: both mean
+        # holding all of it.
+        cache = False if args.no_cache or args.streaming else None
+        window_shards = 1 if args.streaming else args.window_shards
+        lootex_client = LootexClient(cache=cache, metrics=metrics, window_shards=window_shards)
+        opensea_client = OpenSeaClient(cache=cache, metrics=metrics, window_shards=window_shards)
+
+    try:
+        if args.streaming:
+            window = STREAM_WINDOW_SECONDS if args.stream_window is None else args.stream_window
+            results = compare_token_streaming(args.chain, args.contract, args.token, args.start_time, args.end_time,
+                                              lootex_client=lootex_client, opensea_client=opensea_client,
+                                              verbose=not args.quiet, tolerances=tolerances, window_seconds=window,
+                                              metrics=metrics)
+        else:
+            results = compare_token(args.chain, args.contract, args.token, args.start_time, args.end_time,
+                                    lootex_client=lootex_client, opensea_client=opensea_client, verbose=not args.quiet,
+                                    tolerances=tolerances, metrics=metrics, event_store=event_store,
+                                    from_store=args.from_store)
+    finally:
+        if lootex_client is not None:
+            lootex_client.close()
+            opensea_client.close()
+        if event_store is not None:
+            event_store.close()
+
+    token_result = {
+        'chain': args.chain,
+        'contract_address': args.contract,
+        'token_id': args.token,
+        'start_time': args.start_time,
+        'end_time': args.end_time,
+        'status': 'ok',
+        'results': results,
+    }
+    report = SummaryReport()
+    sinks = [report] + ([open_sink(args.output)] if args.output else [])
+    with MultiSink(sinks) as sink:
+        sink.write_token(token_result)
+
+    if args.quiet:
+        report.print()
+    if metrics is not None:
+        print()
+        print(metrics.format_table())
+
+    # OpenSea lists every transfer as a sale event, so sales it alone reports
+    # are expected and, as in the printed comparison, not differences.
+    differences = sum(totals['lootex_only'] + totals['field_diffs']
+                      + (totals['opensea_only'] if event_type != 'sale' else 0)
+                      for event_type, totals in report.by_event_type.items())
+    return 1 if args.check and differences else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
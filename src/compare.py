@@ -0,0 +1,253 @@
+import json
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from src.normalize import EVENT_TYPES, EventBatch, iter_event_batches, normalize_lootex_events, normalize_opensea_events
+from src.reconcile import STREAM_WINDOW_SECONDS, reconcile, stream_reconcile
+from src.contract_events import ContractEvents
+from src.opensea_client import OPENSEA_QUERY_EVENT_TYPES
+
+# Comparison of one token's Lootex and OpenSea histories, shared by
+# src/cli.py, tests/test_comparator.py and tests/batch_comparator.py. The
+# clients are passed in by the caller; nothing here imports the HTTP stack.
+
+# Chain ID mapping
+CHAIN_ID_MAP = {
+    "137": "matic",
+    "matic": "137",
+    "1": "ethereum",
+    "ethereum": "1",
+    "8453": "base",
+    "base": "8453"
+}
+
+def get_chain_info(chain_input):
+    chain_input = str(chain_input).lower()
+    if chain_input in CHAIN_ID_MAP:
+        chain_id = CHAIN_ID_MAP[chain_input] if chain_input.isalpha() else chain_input
+        opensea_chain = CHAIN_ID_MAP[chain_id]
+    else:
+        chain_id = chain_input
+        opensea_chain = chain_input
+    return chain_id, opensea_chain
+
+def parse_lootex_time(time_str):
+    # "YYYY-MM-DD HH:MM:SS" in UTC -> datetime for the Lootex client.
+    if not time_str:
+        return None
+    try:
+        return datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        print(f"Invalid time format: {time_str}. Please use YYYY-MM-DD HH:MM:SS.")
+        return None
+
+def parse_opensea_time(time_str):
+    # Same input as parse_lootex_time -> epoch seconds for the OpenSea client.
+    dt = parse_lootex_time(time_str)
+    return int(dt.timestamp()) if dt is not None else None
+
+def print_comparison(event_type, matching_events, lootex_only, opensea_only, lootex_event, opensea_event):
+    print(f"Total matching events: {len(matching_events)}")
+    print(f"Events only in Lootex: {len(lootex_only)}")
+    print(f"Events only in OpenSea: {len(opensea_only)}")
+
+    if lootex_only:
+        print("\nEvents only in Lootex:")
+        for txhash in lootex_only:
+            # print(f"Transaction Hash: {txhash}")
+            print(json.dumps(lootex_event(txhash), indent=2))
+
+    if event_type != 'sale' and opensea_only:
+        print("\nEvents only in OpenSea:")
+        for txhash in opensea_only:
+            # print(f"Transaction Hash: {txhash}")
+            print(json.dumps(opensea_event(txhash), indent=2))
+
+def compare_batches(lootex_batch, opensea_batch, event_type, verbose=True, tolerances=None):
+    # Same matching as compare_events, on normalized EventBatch objects, plus
+    # a field-level check of every matched pair. Row dicts are only built for
+    # printed events.
+    if verbose:
+        print(f"\n--- Comparing {event_type.capitalize()} Events ---")
+
+    result = reconcile(lootex_batch, opensea_batch, event_type, tolerances)
+
+    if verbose:
+        print_comparison(event_type, result.matching, result.lootex_only, result.opensea_only,
+                         lambda txhash: lootex_batch.to_dict(result.lootex_index[txhash]),
+                         lambda txhash: opensea_batch.to_dict(result.opensea_index[txhash]))
+        print(f"Field differences in matching events: {len(result.diffs)}")
+        for diff in result.diffs:
+            print(f"  {diff.txhash} {diff.field}: Lootex={diff.lootex_value} OpenSea={diff.opensea_value}")
+    return result.to_dict()
+
+def _stage(metrics, name):
+    return metrics.stage(name) if metrics is not None else nullcontext()
+
+def fetch_contract_events(chain_input, contract_address, start_time_str=None, end_time_str=None,
+                          lootex_client=None, opensea_client=None):
+    # Whole-contract histories for compare_token(contract_events=...): one
+    # Lootex crawl without a token filter and one OpenSea collection crawl.
+    chain_id, opensea_chain = get_chain_info(chain_input)
+    lootex_events = lootex_client.get_contract_events(chain_id, contract_address,
+                                                      start_time=parse_lootex_time(start_time_str),
+                                                      end_time=parse_lootex_time(end_time_str))
+    collection_slug = opensea_client.get_contract_collection(opensea_chain, contract_address)
+    opensea_events = opensea_client.iter_collection_events(collection_slug, OPENSEA_QUERY_EVENT_TYPES,
+                                                           parse_opensea_time(start_time_str),
+                                                           parse_opensea_time(end_time_str))
+    return ContractEvents(contract_address, lootex_events, opensea_events)
+
+def compare_token(chain_input, contract_address, token_id, start_time_str=None, end_time_str=None,
+                  lootex_client=None, opensea_client=None, verbose=True, sync_store=None, tolerances=None,
+                  metrics=None, contract_events=None, event_store=None, from_store=False):
+    # contract_events: a ContractEvents for this token's contract and time
+    # range; when given, nothing is fetched per token.
+    # event_store: an EventStore the normalized events are saved to, or with
+    # from_store=True read from instead of fetching anything.
+    chain_id, opensea_chain = get_chain_info(chain_input)
+
+    if from_store:
+        with _stage(metrics, 'store'):
+            start, end = parse_opensea_time(start_time_str), parse_opensea_time(end_time_str)
+            lootex_batch = event_store.load_batch('lootex', chain_id, contract_address, token_id, start, end)
+            opensea_batch = event_store.load_batch('opensea', chain_id, contract_address, token_id, start, end)
+    else:
+        with _stage(metrics, 'fetch'):
+            if contract_events is not None:
+                lootex_events, opensea_events = contract_events.events_for(token_id)
+            else:
+                lootex_events, opensea_events = _fetch_token_events(chain_id, opensea_chain, contract_address,
+                                                                    token_id, start_time_str, end_time_str,
+                                                                    lootex_client, opensea_client, sync_store)
+        if metrics is not None:
+            # Count the lazy OpenSea page fetches as fetching, not normalizing.
+            opensea_events = metrics.timed_iter('fetch', opensea_events)
+
+        # OpenSea events are normalized as the cursor pages arrive.
+        with _stage(metrics, 'normalize'):
+            lootex_batch = normalize_lootex_events(lootex_events)
+            opensea_batch = normalize_opensea_events(opensea_events)
+
+        if event_store is not None:
+            with _stage(metrics, 'store'):
+                event_store.insert_batch(lootex_batch, chain_id, contract_address, token_id)
+                event_store.insert_batch(opensea_batch, chain_id, contract_address, token_id)
+
+    with _stage(metrics, 'compare'):
+        return [
+            compare_batches(lootex_batch, opensea_batch, event_type, verbose=verbose, tolerances=tolerances)
+            for event_type in EVENT_TYPES
+        ]
+
+def _fetch_token_events(chain_id, opensea_chain, contract_address, token_id, start_time_str, end_time_str,
+                        lootex_client, opensea_client, sync_store):
+    if sync_store is not None:
+        from src.incremental_sync import sync_lootex_events, sync_opensea_events
+
+        # Only activity after each token's watermark is fetched; the rest of
+        # the history comes from the store.
+        lootex_events = sync_lootex_events(lootex_client, sync_store, chain_id, contract_address, token_id,
+                                           parse_lootex_time(start_time_str), parse_lootex_time(end_time_str))
+        opensea_events = sync_opensea_events(opensea_client, sync_store, opensea_chain, contract_address, token_id,
+                                             OPENSEA_QUERY_EVENT_TYPES,
+                                             parse_opensea_time(start_time_str), parse_opensea_time(end_time_str))
+    else:
+        # Each marketplace history is fetched once and split by event type
+        # locally, instead of re-crawling it for every event type. OpenSea
+        # pages are followed lazily as the events are normalized.
+        lootex_events = lootex_client.get_nft_events(chain_id, contract_address, token_id,
+                                                     start_time=parse_lootex_time(start_time_str),
+                                                     end_time=parse_lootex_time(end_time_str))
+        opensea_events = opensea_client.iter_nft_events(opensea_chain, contract_address, token_id,
+                                                        OPENSEA_QUERY_EVENT_TYPES, parse_opensea_time(start_time_str),
+                                                        parse_opensea_time(end_time_str))
+    return lootex_events, opensea_events
+
+def compare_token_streaming(chain_input, contract_address, token_id, start_time_str=None, end_time_str=None,
+                            lootex_client=None, opensea_client=None, verbose=True, tolerances=None,
+                            window_seconds=STREAM_WINDOW_SECONDS, metrics=None):
+    # Same result shape as compare_token, from stream_reconcile over both
+    # histories as they are paged in: memory follows the time window plus
+    # the mismatches kept for the result, not the history length. Use
+    # clients built with cache=False, since caching a crawl means holding
+    # all of it.
+    chain_id, opensea_chain = get_chain_info(chain_input)
+    lootex_events = lootex_client.iter_nft_events(chain_id, contract_address, token_id,
+                                                  start_time=parse_lootex_time(start_time_str),
+                                                  end_time=parse_lootex_time(end_time_str))
+    opensea_events = opensea_client.iter_nft_events(opensea_chain, contract_address, token_id, OPENSEA_QUERY_EVENT_TYPES,
+                                                    parse_opensea_time(start_time_str), parse_opensea_time(end_time_str))
+    stream = stream_reconcile(iter_event_batches(lootex_events, normalize_lootex_events),
+                              iter_event_batches(opensea_events, normalize_opensea_events),
+                              tolerances, window_seconds)
+
+    results = {
+        event_type: {'event_type': event_type, 'matching': 0, 'lootex_only': [], 'opensea_only': [], 'field_diffs': []}
+        for event_type in EVENT_TYPES
+    }
+    # Fetching, normalizing and matching are interleaved, so they are timed
+    # as one stage.
+    with _stage(metrics, 'stream'):
+        for kind, event_type, txhash, diffs in stream:
+            result = results[event_type]
+            if kind == 'matching':
+                result['matching'] += 1
+                result['field_diffs'].extend(diff.to_dict() for diff in diffs)
+            else:
+                result[kind].append(txhash)
+
+    for result in results.values():
+        result['lootex_only'].sort()
+        result['opensea_only'].sort()
+        if verbose:
+            print(f"\n--- Comparing {result['event_type'].capitalize()} Events ---")
+            print(f"Total matching events: {result['matching']}")
+            print(f"Events only in Lootex: {len(result['lootex_only'])}")
+            for txhash in result['lootex_only']:
+                print(f"  {txhash}")
+            print(f"Events only in OpenSea: {len(result['opensea_only'])}")
+            # As in print_comparison: OpenSea reports every transfer as a
+            # sale, so its unmatched sales are counted but not listed.
+            if result['event_type'] != 'sale':
+                for txhash in result['opensea_only']:
+                    print(f"  {txhash}")
+            print(f"Field differences in matching events: {len(result['field_diffs'])}")
+            for diff in result['field_diffs']:
+                print(f"  {diff['txhash']} {diff['field']}: Lootex={diff['lootex_value']} OpenSea={diff['opensea_value']}")
+    return list(results.values())
+
+async def compare_token_async(chain_input, contract_address, token_id, start_time_str=None, end_time_str=None,
+                              lootex_client=None, opensea_client=None, verbose=True, tolerances=None, metrics=None):
+    import asyncio
+
+    chain_id, opensea_chain = get_chain_info(chain_input)
+
+    async def fetch_lootex():
+        events = await lootex_client.get_filtered_events(chain_id, contract_address, token_id,
+                                                         parse_lootex_time(start_time_str), parse_lootex_time(end_time_str))
+        return normalize_lootex_events(events)
+
+    async def fetch_opensea():
+        batch = EventBatch('opensea')
+        async for event in opensea_client.iter_nft_events(
+                opensea_chain, contract_address, token_id, event_types=OPENSEA_QUERY_EVENT_TYPES,
+                after=parse_opensea_time(start_time_str), before=parse_opensea_time(end_time_str)):
+            normalize_opensea_events((event,), batch)
+        return batch
+
+    # Both marketplaces are fetched concurrently on the caller's event loop.
+    # Other tokens' coroutines interleave with this one, so stages are timed
+    # directly rather than nested, and normalization counts as fetching.
+    started = time.perf_counter()
+    lootex_batch, opensea_batch = await asyncio.gather(fetch_lootex(), fetch_opensea())
+    fetched = time.perf_counter()
+
+    results = [
+        compare_batches(lootex_batch, opensea_batch, event_type, verbose=verbose, tolerances=tolerances)
+        for event_type in EVENT_TYPES
+    ]
+    if metrics is not None:
+        metrics.add_stage('fetch', fetched - started)
+        metrics.add_stage('compare', time.perf_counter() - fetched)
+    return results
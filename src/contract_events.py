@@ -0,0 +1,39 @@
+from collections import defaultdict
+
+def lootex_event_token(event):
+    return event.get('tokenId')
+
+def opensea_event_token(event, contract_address=None):
+    # Listings carry the NFT as `asset`, everything else as `nft`. A
+    # collection can span several contracts, so events for other contracts
+    # are dropped when contract_address is given.
+    nft = event.get('nft') or event.get('asset') or {}
+    if contract_address is not None and (nft.get('contract') or '').lower() != contract_address.lower():
+        return None
+    return nft.get('identifier')
+
+def shard_by_token(events, token_fn):
+    # token ID (as a string) -> that token's events, in stream order.
+    shards = defaultdict(list)
+    for event in events:
+        token_id = token_fn(event)
+        if token_id is not None:
+            shards[str(token_id)].append(event)
+    return shards
+
+class ContractEvents:
+    # Contract-wide histories from both marketplaces, fetched once and
+    # served per token, so comparing N tokens costs one paginated crawl per
+    # marketplace instead of N.
+    def __init__(self, contract_address, lootex_events, opensea_events):
+        self.contract_address = contract_address
+        self.lootex = shard_by_token(lootex_events, lootex_event_token)
+        self.opensea = shard_by_token(opensea_events, lambda event: opensea_event_token(event, contract_address))
+
+    def token_ids(self):
+        # Every token with activity on either marketplace.
+        return sorted(self.lootex.keys() | self.opensea.keys(), key=lambda token_id: (len(token_id), token_id))
+
+    def events_for(self, token_id):
+        token_id = str(token_id)
+        return self.lootex.get(token_id, []), self.opensea.get(token_id, [])
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import threading
+from config.settings import EVENT_STORE_PATH
+from src.normalize import EVENT_TYPES, EVENT_TYPE_CODES, MISSING_TIME, EventBatch
+
+EVENT_COLUMNS = (
+    'source', 'chain', 'contract_address', 'token_id', 'event_type', 'txhash', 'timestamp', 'expiration',
+    'price_raw', 'price_decimals', 'currency', 'quantity', 'from_address', 'to_address', 'collection'
+)
+
+class EventStore:
+    # Normalized events from both marketplaces, one row per EventBatch row.
+    # Lookups by token and time range use the (chain, contract, token,
+    # event_type, timestamp) index, and lookups by transaction or order
+    # hash the txhash index, so stored histories can be reconciled and
+    # queried without going back to the APIs.
+    #
+    # Addresses are stored lowercased, and the chain is whatever the caller
+    # passes (compare_token uses the numeric chain ID for both sources).
+    # Prices are stored as text because wei amounts overflow SQLite integers.
+    def __init__(self, path=None):
+        self.path = path or EVENT_STORE_PATH
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                source TEXT NOT NULL,
+                chain TEXT NOT NULL,
+                contract_address TEXT NOT NULL,
+                token_id TEXT NOT NULL,
+                event_type INTEGER NOT NULL,
+                txhash TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                expiration INTEGER NOT NULL,
+                price_raw TEXT NOT NULL,
+                price_decimals INTEGER NOT NULL,
+                currency TEXT,
+                quantity INTEGER NOT NULL,
+                from_address TEXT,
+                to_address TEXT,
+                collection TEXT,
+                PRIMARY KEY (source, chain, contract_address, token_id, event_type, txhash)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS events_by_token "
+            "ON events (chain, contract_address, token_id, event_type, timestamp)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS events_by_hash ON events (txhash)")
+        self._conn.commit()
+
+    def insert_batch(self, batch, chain, contract_address, token_id=None):
+        # One transaction per batch. token_id=None keeps each row's own token
+        # (e.g. a contract-wide batch). Re-inserted events replace the
+        # stored copy.
+        contract_address = contract_address.lower()
+        rows = [
+            (batch.source, str(chain), contract_address,
+             str(token_id if token_id is not None else batch.token_id[i]),
+             batch.event_type[i], batch.txhash[i], batch.timestamp[i], batch.expiration[i],
+             str(batch.price_raw[i]), batch.price_decimals[i], batch.currency[i], batch.quantity[i],
+             _lower(batch.from_address[i]), _lower(batch.to_address[i]), batch.collection[i])
+            for i in range(len(batch))
+            if batch.txhash[i] is not None
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO events VALUES ({', '.join('?' * len(EVENT_COLUMNS))})", rows
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def load_batch(self, source, chain, contract_address, token_id, start=None, end=None, event_type=None):
+        # Stored events for one token as an EventBatch, newest first. start
+        # and end are exclusive epoch seconds, like the live APIs' bounds.
+        # Undated rows (MISSING_TIME) cannot be placed in a range, so as with
+        # the live APIs they are only returned when neither bound is set.
+        query = ("SELECT event_type, txhash, timestamp, expiration, price_raw, price_decimals, currency, quantity, "
+                 "from_address, to_address, contract_address, token_id, collection FROM events "
+                 "WHERE chain = ? AND contract_address = ? AND token_id = ?")
+        params = [str(chain), contract_address.lower(), str(token_id)]
+        if event_type is not None:
+            query += " AND event_type = ?"
+            params.append(EVENT_TYPE_CODES[event_type])
+        if start is not None or end is not None:
+            query += " AND timestamp != ?"
+            params.append(MISSING_TIME)
+        if start is not None:
+            query += " AND timestamp > ?"
+            params.append(int(start))
+        if end is not None:
+            query += " AND timestamp < ?"
+            params.append(int(end))
+        query += " AND source = ? ORDER BY timestamp DESC"
+        params.append(source)
+
+        batch = EventBatch(source)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            batch.append(row[0], row[1], row[2], row[3], int(row[4]), *row[5:])
+        return batch
+
+    def find_by_hash(self, txhash):
+        # Every stored event with this transaction or order hash, from
+        # either source.
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(EVENT_COLUMNS)} FROM events WHERE txhash = ?", (txhash,)
+            ).fetchall()
+        events = []
+        for row in rows:
+            event = dict(zip(EVENT_COLUMNS, row))
+            event['event_type'] = EVENT_TYPES[event['event_type']]
+            event['price_raw'] = int(event['price_raw'])
+            events.append(event)
+        return events
+
+    def count(self, source=None, chain=None, contract_address=None, token_id=None):
+        query = "SELECT COUNT(*) FROM events WHERE 1 = 1"
+        params = []
+        for column, value in (('chain', chain), ('contract_address', contract_address), ('token_id', token_id)):
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(str(value).lower() if column == 'contract_address' else str(value))
+        if source is not None:
+            query += " AND source = ?"
+            params.append(source)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _lower(address):
+    return address.lower() if address else address
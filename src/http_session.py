@@ -0,0 +1,127 @@
+import json
+import time
+import random
+from config.settings import (
+    HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX
+)
+from src.rate_limit import get_rate_limiter
+
+DEFAULT_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class MarketplaceAPIError(Exception):
+    def __init__(self, status_code, body, url):
+        self.status_code = status_code
+        self.body = body
+        self.url = url
+        super().__init__(f"HTTP {status_code} from {url}: {body[:200]}")
+
+def parse_retry_after(value):
+    # Retry-After is either a number of seconds or an HTTP date.
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt, retry_after=None):
+    # Full jitter keeps many workers that were throttled together from
+    # retrying in lockstep; the server's Retry-After is a lower bound.
+    delay = random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+def create_session(pool_size=None):
+    # One adapter per scheme keeps up to pool_size idle keep-alive connections
+    # per host, so consecutive pages reuse the same TCP/TLS connection.
+    # requests is imported on first use, so importing a client module (e.g.
+    # for its helpers, or a --from-store run) does not pay for it.
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    pool_size = pool_size or HTTP_POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class SessionMixin:
+    def _init_session(self, session=None, pool_size=None, timeout=None, max_retries=None, metrics=None):
+        self._owns_session = session is None
+        self.session = session or create_session(pool_size)
+        self.timeout = timeout or DEFAULT_TIMEOUT
+        self.max_retries = HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.metrics = metrics
+
+    def _get(self, url, headers=None, params=None, endpoint=None):
+        # GET through the per-host rate limiter, retrying throttled, 5xx and
+        # dropped requests. Returns the 200 response or raises
+        # MarketplaceAPIError once the retries are used up. `endpoint` labels
+        # the request in self.metrics.
+        import requests
+
+        limiter = get_rate_limiter(url)
+        metrics = self.metrics
+
+        for attempt in range(self.max_retries + 1):
+            limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if metrics is not None:
+                    metrics.record_response(endpoint, time.perf_counter() - started, None)
+                if attempt == self.max_retries:
+                    raise
+                if metrics is not None:
+                    metrics.record_retry(endpoint)
+                time.sleep(retry_delay(attempt))
+                continue
+
+            if metrics is not None:
+                metrics.record_response(endpoint, time.perf_counter() - started, response.status_code)
+            if response.status_code == 200:
+                limiter.on_success()
+                return response
+            if response.status_code == 429:
+                limiter.on_throttled()
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                raise MarketplaceAPIError(response.status_code, response.text, response.url)
+
+            if metrics is not None:
+                metrics.record_retry(endpoint)
+            time.sleep(retry_delay(attempt, parse_retry_after(response.headers.get('Retry-After'))))
+
+    def _get_json(self, url, headers=None, params=None, endpoint=None):
+        response = self._get(url, headers, params, endpoint)
+        if self.metrics is None:
+            return response.json()
+        body = response.content
+        started = time.perf_counter()
+        data = json.loads(body)
+        self.metrics.record_body(endpoint, len(body), time.perf_counter() - started)
+        return data
+
+    def _record_page(self, endpoint, events):
+        if self.metrics is not None:
+            self.metrics.record_page(endpoint, events)
+
+    def close(self):
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from config.settings import SYNC_STORE_PATH, SYNC_OVERLAP_SECONDS
+from src.lootex_client import history_event_key, history_event_timestamp, to_epoch
+from src.opensea_client import opensea_event_key, opensea_event_timestamp
+
+class SyncStore:
+    # Keeps every raw event seen per (marketplace, chain, contract, token)
+    # together with a watermark: the newest event timestamp fetched by a
+    # complete crawl. Later runs only ask the APIs for events after it.
+    def __init__(self, path=None):
+        self.path = path or SYNC_STORE_PATH
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                marketplace TEXT NOT NULL,
+                chain TEXT NOT NULL,
+                contract_address TEXT NOT NULL,
+                token_id TEXT NOT NULL,
+                watermark REAL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (marketplace, chain, contract_address, token_id)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                marketplace TEXT NOT NULL,
+                chain TEXT NOT NULL,
+                contract_address TEXT NOT NULL,
+                token_id TEXT NOT NULL,
+                event_key TEXT NOT NULL,
+                timestamp REAL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (marketplace, chain, contract_address, token_id, event_key)
+            )
+        """)
+        self._conn.commit()
+
+    def get_watermark(self, marketplace, chain, contract_address, token_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM watermarks WHERE marketplace = ? AND chain = ? AND contract_address = ? AND token_id = ?",
+                (marketplace, str(chain), contract_address, str(token_id))
+            ).fetchone()
+        return row[0] if row else None
+
+    def merge(self, marketplace, chain, contract_address, token_id, new_events, key_fn, time_fn, complete=True):
+        token = (marketplace, str(chain), contract_address, str(token_id))
+        rows = [
+            token + (json.dumps(key_fn(event)), time_fn(event), json.dumps(event))
+            for event in new_events
+        ]
+
+        with self._lock:
+            # Events seen again in the overlap window replace the stored copy.
+            self._conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+            # A partial crawl may have skipped events older than the ones it
+            # returned, so only a complete one may move the watermark.
+            if complete:
+                newest = self._conn.execute(
+                    "SELECT MAX(timestamp) FROM events "
+                    "WHERE marketplace = ? AND chain = ? AND contract_address = ? AND token_id = ?",
+                    token
+                ).fetchone()[0]
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?, ?)",
+                    token + (newest, time.time())
+                )
+            self._conn.commit()
+
+    def load_events(self, marketplace, chain, contract_address, token_id, start=None, end=None):
+        query = ("SELECT payload FROM events "
+                 "WHERE marketplace = ? AND chain = ? AND contract_address = ? AND token_id = ?")
+        params = [marketplace, str(chain), contract_address, str(token_id)]
+        if start is not None:
+            query += " AND timestamp >= ?"
+            params.append(start)
+        if end is not None:
+            query += " AND timestamp <= ?"
+            params.append(end)
+        query += " ORDER BY timestamp DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(payload) for payload, in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def sync_lootex_events(client, store, chain_id, contract_address, token_id, start_time=None, end_time=None):
+    watermark = store.get_watermark('lootex', chain_id, contract_address, token_id)
+    since = None
+    if watermark is not None:
+        # Lootex expects naive UTC times; the overlap catches events that
+        # share the watermark timestamp or were indexed late.
+        since = datetime.fromtimestamp(watermark - SYNC_OVERLAP_SECONDS, tz=timezone.utc).replace(tzinfo=None)
+
+    new_events, complete = client.crawl_nft_events(chain_id, contract_address, token_id, start_time=since)
+    store.merge('lootex', chain_id, contract_address, token_id, new_events,
+                history_event_key, history_event_timestamp, complete)
+
+    start_ts, end_ts = to_epoch(start_time), to_epoch(end_time)
+    events = store.load_events('lootex', chain_id, contract_address, token_id, start_ts, end_ts)
+    # load_events bounds are inclusive, startTimeGt/startTimeLt are not. An
+    # unset bound drops nothing, so undated events survive an unbounded sync.
+    return [event for event in events
+            if (start_ts is None or history_event_timestamp(event) != start_ts)
+            and (end_ts is None or history_event_timestamp(event) != end_ts)]
+
+def sync_opensea_events(client, store, chain, contract_address, token_id, event_types=None, after=None, before=None):
+    # Different event_type filters return different sets, so each gets its
+    # own watermark.
+    if isinstance(event_types, str):
+        event_types = [event_types]
+    marketplace = "opensea:" + ",".join(sorted(event_types or []))
+
+    watermark = store.get_watermark(marketplace, chain, contract_address, token_id)
+    since = None if watermark is None else int(watermark - SYNC_OVERLAP_SECONDS)
+
+    new_events, complete = client.crawl_nft_events(chain, contract_address, token_id, event_types=event_types, after=since)
+    store.merge(marketplace, chain, contract_address, token_id, new_events,
+                opensea_event_key, opensea_event_timestamp, complete)
+
+    return store.load_events(marketplace, chain, contract_address, token_id, after, before)
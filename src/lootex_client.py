@@ -1,60 +1,237 @@
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
-from config.settings import LOOTEX_API_URL
-from datetime import datetime, timezone
+from config.settings import LOOTEX_API_URL, LOOTEX_MAX_WORKERS, HTTP_POOL_SIZE, HISTORY_WINDOW_SHARDS
+from src.http_session import SessionMixin
+from src.response_cache import get_default_cache
+from src.time_windows import split_time_window, dedupe_windows
+from datetime import datetime, timezone, timedelta
 
-class LootexClient:
-    def __init__(self):
+HISTORY_HEADERS = {
+    "Content-Type": "application/json"
+}
+
+def build_history_params(chain_id, contract_address, token_id, limit, start_time=None, end_time=None):
+    params = {
+        "limit": limit,
+        "chainId": chain_id,
+        "contractAddress": contract_address,
+        "platformType": 1
+    }
+
+    # Without a token ID the history covers every token of the contract.
+    if token_id is not None:
+        params["tokenId"] = token_id
+
+    if start_time:
+        params["startTimeGt"] = start_time.isoformat() + "Z"
+    if end_time:
+        params["startTimeLt"] = end_time.isoformat() + "Z"
+
+    return params
+
+def parse_history_page(data):
+    events = data.get('ordersHistory', [])
+    total_pages = data.get('pagination', {}).get('totalPage', 1)
+    return events, total_pages
+
+def apply_page_results(batch, results, pages, last_page, limit):
+    # Records one round of concurrently fetched pages and returns the updated
+    # last page and whether the crawl has to stop. Each response reports
+    # totalPage again: if the history grew while we were crawling, the newly
+    # reported pages are fetched in another round, and a short page or an
+    # error marks the end.
+    for batch_page, result in zip(batch, results):
+        if result is None:
+            return batch_page - 1, True
+        events, total_pages = result
+        pages[batch_page] = events
+        if len(events) < limit:
+            return batch_page, False
+    return max(last_page, total_pages), False
+
+def to_epoch(dt):
+    # Naive datetimes are sent to the API with a "Z" suffix, i.e. as UTC.
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def history_event_timestamp(event):
+    start_time = event.get('startTime')
+    if not start_time:
+        return None
+    return datetime.fromisoformat(start_time.replace('Z', '+00:00')).timestamp()
+
+def history_event_key(event):
+    return (event.get('category'), event.get('hash'), event.get('txHash'), event.get('startTime'))
+
+def _within_bounds(timestamp, start_ts, end_ts):
+    # Exclusive bounds, like startTimeGt/startTimeLt. An event without a
+    # startTime cannot be placed inside a bounded range, so it only passes
+    # when there are no bounds at all.
+    if start_ts is None and end_ts is None:
+        return True
+    if timestamp is None:
+        return False
+    return (start_ts is None or timestamp > start_ts) and (end_ts is None or timestamp < end_ts)
+
+def merge_history_pages(pages, last_page):
+    # Merge in page order. New events shift older ones towards later pages
+    # mid-crawl, so the same entry can appear on two pages.
+    all_events = []
+    seen = set()
+    for page_number in sorted(p for p in pages if p <= last_page):
+        for event in pages[page_number]:
+            key = history_event_key(event)
+            if key in seen:
+                continue
+            seen.add(key)
+            all_events.append(event)
+    return all_events
+
+class LootexClient(SessionMixin):
+    def __init__(self, max_workers=None, session=None, pool_size=None, timeout=None, cache=None, max_retries=None,
+                 metrics=None, window_shards=None):
         self.base_url = LOOTEX_API_URL
+        self.max_workers = max_workers or LOOTEX_MAX_WORKERS
+        self.window_shards = window_shards or HISTORY_WINDOW_SHARDS
+        # cache=False turns caching off even when RESPONSE_CACHE_PATH is set.
+        self.cache = get_default_cache() if cache is None else (cache or None)
+        # Every concurrent page worker needs its own pooled connection.
+        pool_size = max(pool_size or HTTP_POOL_SIZE, self.max_workers * self.window_shards)
+        self._init_session(session, pool_size, timeout, max_retries, metrics)
+
+    def _fetch_page(self, endpoint, params, page):
+        url = f"{endpoint}?{urlencode({**params, 'page': page})}"
+        events, total_pages = parse_history_page(self._get_json(url, HISTORY_HEADERS, endpoint='lootex.history'))
+        self._record_page('lootex.history', len(events))
+        return events, total_pages
 
-    def get_nft_events(self, chain_id, contract_address, token_id, limit=30, page=1, start_time=None, end_time=None):
+    def crawl_nft_events(self, chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
+        # Uncached crawl; returns the merged events and whether every page
+        # was fetched. A bounded range is split into window_shards windows
+        # crawled concurrently, so a deep history takes as long as its
+        # slowest window rather than its whole page count.
+        windows = split_time_window(start_time, end_time, self.window_shards)
+        if windows is None:
+            return self._crawl_window(chain_id, contract_address, token_id, limit, start_time, end_time)
+
+        # startTimeGt/startTimeLt are both exclusive: each window starts a
+        # second early so nothing on a boundary is skipped, and the events
+        # in that overlap are dropped by hash.
+        windows = [(max(start_time, start - timedelta(seconds=1)), end) for start, end in windows]
+        with ThreadPoolExecutor(max_workers=len(windows)) as executor:
+            results = list(executor.map(
+                lambda window: self._crawl_window(chain_id, contract_address, token_id, limit, *window), windows))
+
+        events = [event for window in dedupe_windows((events for events, _ in results), history_event_key)
+                  for event in window]
+        return events, all(complete for _, complete in results)
+
+    def _crawl_window(self, chain_id, contract_address, token_id, limit, start_time, end_time):
         endpoint = f"{self.base_url}/orders/history"
-        headers = {
-            "Content-Type": "application/json"
-        }
-        
-        all_events = []
-        page = 1
-        
-        while True:
-            params = {
-                "limit": limit,
-                "chainId": chain_id,
-                "contractAddress": contract_address,
-                "tokenId": token_id,
-                "page": page,
-                "platformType": 1
-            }
-            
-            if start_time:
-                params["startTimeGt"] = start_time.isoformat() + "Z"
-            if end_time:
-                params["startTimeLt"] = end_time.isoformat() + "Z"
-
-            url = f"{endpoint}?{urlencode(params)}"
-            response = requests.get(url, headers=headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                events = data.get('ordersHistory', [])
-                all_events.extend(events)
-                
-                pagination = data.get('pagination', {})
-                total_pages = pagination.get('totalPage', 1)
-                
-                if page >= total_pages or len(events) < limit:
+        params = build_history_params(chain_id, contract_address, token_id, limit, start_time, end_time)
+
+        first = self._fetch_page(endpoint, params, 1)
+        if first is None:
+            return [], False
+
+        events, total_pages = first
+        pages = {1: events}
+        last_page = 1 if len(events) < limit else total_pages
+        next_page = 2
+        stop = False
+
+        # The first response tells us how many pages exist, so the rest can be
+        # requested in parallel.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while next_page <= last_page:
+                batch = range(next_page, last_page + 1)
+                results = list(executor.map(lambda p: self._fetch_page(endpoint, params, p), batch))
+                last_page, stop = apply_page_results(batch, results, pages, last_page, limit)
+                next_page = batch.stop
+                if stop:
                     break
-                
-                page += 1
-            else:
-                print(f"Error on page {page}: {response.status_code}")
-                print(response.text)
-                break
-
-        return all_events
+
+        return merge_history_pages(pages, last_page), not stop
+
+    def iter_nft_events(self, chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
+        # Streams the history newest first instead of merging every page up
+        # front: pages are fetched max_workers at a time and dropped once
+        # yielded. An entry pushed onto the next page by new activity can
+        # only repeat there, so only the previous page's keys are kept.
+        # Uncached and unsharded, which keeps memory at one round of pages.
+        endpoint = f"{self.base_url}/orders/history"
+        params = build_history_params(chain_id, contract_address, token_id, limit, start_time, end_time)
+
+        events, total_pages = self._fetch_page(endpoint, params, 1)
+        pages = {1: events}
+        last_page = 1 if len(events) < limit else total_pages
+        next_page = 2
+        stop = False
+        seen = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                for page_number in sorted(p for p in pages if p <= last_page):
+                    page_keys = set()
+                    for event in pages[page_number]:
+                        key = history_event_key(event)
+                        if key not in seen and key not in page_keys:
+                            yield event
+                        page_keys.add(key)
+                    seen = page_keys
+
+                if stop or next_page > last_page:
+                    return
+                batch = range(next_page, min(last_page, next_page + self.max_workers - 1) + 1)
+                results = list(executor.map(lambda p: self._fetch_page(endpoint, params, p), batch))
+                pages = {}
+                last_page, stop = apply_page_results(batch, results, pages, last_page, limit)
+                next_page = batch.stop
+
+    def _cache_scope(self, chain_id, contract_address, token_id):
+        return f"lootex|{self.base_url}|{chain_id}|{contract_address}|{token_id}"
+
+    def parse_event_time(self, event):
+        timestamp = history_event_timestamp(event)
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+    def get_nft_events(self, chain_id, contract_address, token_id, limit=30, page=1, start_time=None, end_time=None, bypass_cache=False):
+        if self.cache is None:
+            return self.crawl_nft_events(chain_id, contract_address, token_id, limit, start_time, end_time)[0]
+
+        scope = self._cache_scope(chain_id, contract_address, token_id)
+        start_ts, end_ts = to_epoch(start_time), to_epoch(end_time)
+
+        prefix = None
+        fetch_start = start_time
+        if not bypass_cache:
+            cached = self.cache.lookup_prefix(scope, start_ts, end_ts)
+            if self.metrics is not None:
+                self.metrics.incr('lootex.cache_hit' if cached is not None else 'lootex.cache_miss')
+            if cached is not None:
+                # The cached window may be wider than this request.
+                events, fetch_from = cached
+                events = [event for event in events if _within_bounds(history_event_timestamp(event), start_ts, end_ts)]
+                if fetch_from is None:
+                    return events
+                # Only the history after the settled part of a stale entry is
+                # fetched again.
+                prefix = [event for event in events if (history_event_timestamp(event) or 0) <= fetch_from]
+                fetch_start = datetime.fromtimestamp(fetch_from, tz=timezone.utc).replace(tzinfo=None)
+
+        events, complete = self.crawl_nft_events(chain_id, contract_address, token_id, limit, fetch_start, end_time)
+        if prefix is not None:
+            events = merge_history_pages({1: events, 2: prefix}, 2)
+        if complete:
+            self.cache.store(scope, start_ts, end_ts, events)
+        return events
         
-    def get_filtered_events(self, chain_id, contract_address, token_id, start_time, end_time, limit=30):
-        return self.get_nft_events(chain_id, contract_address, token_id, limit, start_time=start_time, end_time=end_time)
+    def get_filtered_events(self, chain_id, contract_address, token_id, start_time, end_time, limit=30, bypass_cache=False):
+        return self.get_nft_events(chain_id, contract_address, token_id, limit, start_time=start_time, end_time=end_time,
+                                   bypass_cache=bypass_cache)
   
         if start_time is None and end_time is None:
             return all_events
@@ -64,4 +241,10 @@ class LootexClient:
             if start_time <= self.parse_event_time(event) <= end_time
         ]
         
-        return filtered_events
\ No newline at end of file
+        return filtered_events
+
+    def get_contract_events(self, chain_id, contract_address, limit=30, start_time=None, end_time=None, bypass_cache=False):
+        # One crawl for every token of the contract; shard the result with
+        # src.contract_events.shard_by_token.
+        return self.get_nft_events(chain_id, contract_address, None, limit, start_time=start_time, end_time=end_time,
+                                   bypass_cache=bypass_cache)
@@ -0,0 +1,171 @@
+import json
+import threading
+from array import array
+from collections import Counter
+from time import perf_counter
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class EndpointStats:
+    # seconds holds one entry per HTTP attempt, for percentiles.
+    __slots__ = ('seconds', 'statuses', 'retries', 'bytes', 'decode_seconds', 'pages', 'events')
+
+    def __init__(self):
+        self.seconds = array('d')
+        self.statuses = Counter()
+        self.retries = 0
+        self.bytes = 0
+        self.decode_seconds = 0.0
+        self.pages = 0
+        self.events = 0
+
+    def to_dict(self):
+        return {
+            'requests': len(self.seconds),
+            'retries': self.retries,
+            'statuses': {str(status): count for status, count in self.statuses.items()},
+            'total_seconds': round(sum(self.seconds), 6),
+            'p50_ms': round(_percentile(self.seconds, 0.50) * 1000, 3),
+            'p95_ms': round(_percentile(self.seconds, 0.95) * 1000, 3),
+            'max_ms': round(max(self.seconds, default=0.0) * 1000, 3),
+            'bytes': self.bytes,
+            'decode_seconds': round(self.decode_seconds, 6),
+            'pages': self.pages,
+            'events': self.events,
+            'events_per_page': round(self.events / self.pages, 2) if self.pages else 0.0,
+        }
+
+class Metrics:
+    # Collects request, page and stage timings from the clients and the
+    # comparator. Everything that reports here takes metrics=None, which
+    # skips recording entirely, so an uninstrumented run only pays for an
+    # `is not None` check.
+    #
+    # Stage times are exclusive: time spent in a stage nested inside another
+    # on the same thread (e.g. fetching OpenSea pages while normalizing them)
+    # is only counted for the inner stage.
+    def __init__(self):
+        self.endpoints = {}
+        self.stages = {}
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _endpoint(self, endpoint):
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        return stats
+
+    def record_response(self, endpoint, seconds, status):
+        # One HTTP attempt; status is None for a dropped connection.
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.seconds.append(seconds)
+            stats.statuses[status] += 1
+
+    def record_retry(self, endpoint):
+        with self._lock:
+            self._endpoint(endpoint).retries += 1
+
+    def record_body(self, endpoint, nbytes, decode_seconds):
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.bytes += nbytes
+            stats.decode_seconds += decode_seconds
+
+    def record_page(self, endpoint, events):
+        with self._lock:
+            stats = self._endpoint(endpoint)
+            stats.pages += 1
+            stats.events += events
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def add_stage(self, name, seconds, calls=1):
+        with self._lock:
+            total = self.stages.get(name)
+            self.stages[name] = (seconds, calls) if total is None else (total[0] + seconds, total[1] + calls)
+
+    def _enter(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        return perf_counter()
+
+    def _exit(self, name, started, calls=1):
+        elapsed = perf_counter() - started
+        stack = self._local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        self.add_stage(name, elapsed - nested, calls)
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def timed_iter(self, name, iterable):
+        # Adds the time spent producing each item (e.g. a lazy page crawl)
+        # to `name`, without counting a call, instead of to the consumer's
+        # stage.
+        iterator = iter(iterable)
+        while True:
+            started = self._enter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit(name, started, 0)
+            yield item
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'endpoints': {name: stats.to_dict() for name, stats in self.endpoints.items()},
+                'stages': {name: {'seconds': round(seconds, 6), 'calls': calls}
+                           for name, (seconds, calls) in self.stages.items()},
+                'counters': dict(self.counters),
+            }
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def format_table(self):
+        data = self.to_dict()
+        lines = [f"{'endpoint':<20} {'requests':>8} {'retries':>7} {'p50 ms':>9} {'p95 ms':>9} "
+                 f"{'MB':>9} {'decode s':>9} {'pages':>7} {'ev/page':>8}"]
+        for name, stats in data['endpoints'].items():
+            lines.append(f"{name:<20} {stats['requests']:>8} {stats['retries']:>7} {stats['p50_ms']:>9.1f} "
+                         f"{stats['p95_ms']:>9.1f} {stats['bytes'] / 2 ** 20:>9.2f} {stats['decode_seconds']:>9.3f} "
+                         f"{stats['pages']:>7} {stats['events_per_page']:>8.1f}")
+        if data['stages']:
+            lines.append(f"\n{'stage':<20} {'seconds':>10} {'calls':>8}")
+            for name, stage in data['stages'].items():
+                lines.append(f"{name:<20} {stage['seconds']:>10.3f} {stage['calls']:>8}")
+        if data['counters']:
+            lines.append("")
+            lines.extend(f"{name:<24} {value:>10}" for name, value in data['counters'].items())
+        return "\n".join(lines)
+
+class _Stage:
+    __slots__ = ('metrics', 'name', 'started')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = self.metrics._enter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics._exit(self.name, self.started)
@@ -0,0 +1,218 @@
+from array import array
+from itertools import islice
+from decimal import Decimal, InvalidOperation
+from datetime import datetime, timezone
+
+EVENT_TYPES = ('listing', 'cancel', 'sale')
+EVENT_TYPE_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+
+LOOTEX_CATEGORY_CODES = {'list': 0, 'cancel': 1, 'sale': 2}
+OPENSEA_EVENT_TYPE_CODES = {'order': 0, 'cancel': 1, 'transfer': 2}
+
+MISSING_TIME = 0
+
+# Rows per EventBatch when a stream is normalized in chunks.
+STREAM_CHUNK_SIZE = 500
+
+def _days_from_civil(year, month, day):
+    # Days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant's
+    # algorithm); avoids building a datetime per event.
+    year -= month <= 2
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def parse_iso_timestamp(value):
+    # Lootex timestamps look like 2024-05-01T12:34:56.000Z. That shape is
+    # parsed by slicing; anything else goes through datetime.
+    if not value or value == 'N/A':
+        return MISSING_TIME
+    if len(value) >= 20 and value[-1] == 'Z' and value[10] == 'T':
+        days = _days_from_civil(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+        return days * 86400 + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+def parse_decimal_price(value):
+    # "0.015" -> (15, 3); keeps the exact value without floats.
+    if value is None or value == 'N/A':
+        return 0, 0
+    try:
+        sign, digits, exponent = Decimal(str(value)).as_tuple()
+    except InvalidOperation:
+        return 0, 0
+    raw = int(''.join(map(str, digits)) or 0)
+    if exponent > 0:
+        raw *= 10 ** exponent
+        exponent = 0
+    return -raw if sign else raw, -exponent
+
+def format_price(raw, decimals):
+    if decimals == 0:
+        return str(raw)
+    sign = '-' if raw < 0 else ''
+    digits = str(abs(raw)).rjust(decimals + 1, '0')
+    return f"{sign}{digits[:-decimals]}.{digits[-decimals:]}".rstrip('0').rstrip('.')
+
+def format_timestamp(timestamp):
+    if timestamp == MISSING_TIME:
+        return 'N/A'
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+class EventBatch:
+    # Column-oriented store for normalized events from one marketplace. Times
+    # are UTC epoch seconds and prices are exact per-unit integers with their
+    # number of decimals, so comparisons need no string parsing. Row dicts are
+    # only built on demand through to_dict().
+    __slots__ = (
+        'source', 'event_type', 'txhash', 'timestamp', 'expiration', 'price_raw', 'price_decimals',
+        'currency', 'quantity', 'from_address', 'to_address', 'contract_address', 'token_id', 'collection'
+    )
+
+    def __init__(self, source):
+        self.source = source
+        self.event_type = array('b')
+        self.txhash = []
+        self.timestamp = array('q')
+        self.expiration = array('q')
+        self.price_raw = []
+        self.price_decimals = array('b')
+        self.currency = []
+        self.quantity = array('q')
+        self.from_address = []
+        self.to_address = []
+        self.contract_address = []
+        self.token_id = []
+        self.collection = []
+
+    def __len__(self):
+        return len(self.txhash)
+
+    def append(self, event_type, txhash, timestamp, expiration=MISSING_TIME, price_raw=0, price_decimals=0,
+               currency=None, quantity=0, from_address=None, to_address=None, contract_address=None,
+               token_id=None, collection=None):
+        self.event_type.append(event_type)
+        self.txhash.append(txhash)
+        self.timestamp.append(timestamp)
+        self.expiration.append(expiration)
+        self.price_raw.append(price_raw)
+        self.price_decimals.append(price_decimals)
+        self.currency.append(currency)
+        self.quantity.append(quantity)
+        self.from_address.append(from_address)
+        self.to_address.append(to_address)
+        self.contract_address.append(contract_address)
+        self.token_id.append(token_id)
+        self.collection.append(collection)
+
+    def indices(self, event_type):
+        code = EVENT_TYPE_CODES[event_type]
+        return [i for i, value in enumerate(self.event_type) if value == code]
+
+    def to_dict(self, i):
+        return {
+            'event_type': EVENT_TYPES[self.event_type[i]],
+            'created_time': format_timestamp(self.timestamp[i]),
+            'expiration_time': format_timestamp(self.expiration[i]),
+            'from_address': self.from_address[i],
+            'to_address': self.to_address[i],
+            'price': f"{format_price(self.price_raw[i], self.price_decimals[i])} {self.currency[i]}",
+            'txhash': self.txhash[i],
+            'collection_name': self.collection[i],
+            'contract_address': self.contract_address[i],
+            'token_id': self.token_id[i],
+            'quantity': self.quantity[i]
+        }
+
+def normalize_lootex_events(events, batch=None):
+    # Accepts any iterable of raw /orders/history entries (a page, or a
+    # generator over many) and appends them to batch.
+    batch = batch if batch is not None else EventBatch('lootex')
+    for event in events:
+        code = LOOTEX_CATEGORY_CODES.get(event.get('category'))
+        if code is None:
+            continue
+        price_raw, price_decimals = parse_decimal_price(event.get('price'))
+        batch.append(
+            code,
+            event.get('txHash' if code == 2 else 'hash', 'N/A'),
+            parse_iso_timestamp(event.get('startTime')),
+            parse_iso_timestamp(event.get('endTime')) if code == 0 else MISSING_TIME,
+            price_raw,
+            price_decimals,
+            event.get('currencySymbol'),
+            int(event.get('amount') or 0),
+            event.get('fromAddress'),
+            event.get('toAddress'),
+            event.get('contractAddress'),
+            event.get('tokenId'),
+            (event.get('collectionName') or 'N/A').lower().replace(' ', '-')
+        )
+    return batch
+
+def normalize_opensea_events(events, batch=None):
+    # Same selection rules as the test_opensea formatters: offer cancels and
+    # transfers missing their parties or hash are dropped.
+    batch = batch if batch is not None else EventBatch('opensea')
+    for event in events:
+        code = OPENSEA_EVENT_TYPE_CODES.get(event.get('event_type'))
+        if code is None:
+            continue
+
+        if code == 0:
+            asset = event.get('asset') or {}
+            payment = event.get('payment') or {}
+            quantity = int(event.get('quantity') or 0)
+            total = int(payment.get('quantity') or 0)
+            batch.append(
+                code,
+                event.get('order_hash'),
+                int(event.get('start_date') or event.get('event_timestamp') or MISSING_TIME),
+                int(event.get('expiration_date') or MISSING_TIME),
+                total // quantity if quantity else total,
+                int(payment.get('decimals') or 0),
+                payment.get('symbol'),
+                quantity,
+                event.get('maker'),
+                None,
+                asset.get('contract'),
+                asset.get('identifier'),
+                asset.get('collection')
+            )
+            continue
+
+        nft = event.get('nft') or {}
+        if code == 1 and event.get('order_type') == 'offer':
+            continue
+        if code == 2 and not (all(key in event for key in ('from_address', 'to_address', 'transaction'))
+                              and 'contract' in nft and 'identifier' in nft):
+            continue
+
+        batch.append(
+            code,
+            event.get('order_hash') if code == 1 else event.get('transaction'),
+            int(event.get('event_timestamp') or MISSING_TIME),
+            quantity=int(event.get('quantity') or 0),
+            from_address=event.get('from_address'),
+            to_address=event.get('to_address'),
+            contract_address=nft.get('contract'),
+            token_id=nft.get('identifier'),
+            collection=nft.get('collection')
+        )
+    return batch
+
+def iter_event_batches(events, normalize, chunk_size=STREAM_CHUNK_SIZE):
+    # Normalizes a stream of raw events (e.g. a lazy page crawl) into
+    # EventBatch chunks of up to chunk_size rows, in stream order.
+    events = iter(events)
+    while True:
+        chunk = list(islice(events, chunk_size))
+        if not chunk:
+            return
+        batch = normalize(chunk)
+        if len(batch):
+            yield batch
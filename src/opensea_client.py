@@ -1,31 +1,218 @@
-import requests
-from config.settings import OPENSEA_API_KEY, OPENSEA_API_URL
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import OPENSEA_API_KEY, OPENSEA_API_URL, HISTORY_WINDOW_SHARDS, HTTP_POOL_SIZE
+from src.http_session import SessionMixin
+from src.response_cache import get_default_cache
+from src.time_windows import split_time_window, dedupe_windows
 
-class OpenSeaClient:
-    def __init__(self):
+# Query parameter values for a single request covering every compared type.
+OPENSEA_QUERY_EVENT_TYPES = ["listing", "cancel", "transfer"]
+
+def opensea_event_key(event):
+    return (event.get('event_type'), event.get('order_hash'), event.get('transaction'), event.get('event_timestamp'))
+
+def opensea_event_timestamp(event):
+    return event.get('event_timestamp')
+
+def build_events_params(event_types=None, after=None, before=None, limit=50, next=None):
+    params = {"limit": limit}
+
+    if event_types:
+        # requests encodes a list as repeated event_type params, which is
+        # how the v2 events endpoint accepts multiple types in one call.
+        params["event_type"] = event_types
+
+    if after is not None:
+        params["after"] = int(after)
+    if before is not None:
+        params["before"] = int(before)
+    if next:
+        params["next"] = next
+
+    return params
+
+class OpenSeaClient(SessionMixin):
+    def __init__(self, session=None, pool_size=None, timeout=None, cache=None, max_retries=None, metrics=None,
+                 window_shards=None):
         self.api_key = OPENSEA_API_KEY
         self.base_url = OPENSEA_API_URL
+        self.window_shards = window_shards or HISTORY_WINDOW_SHARDS
+        # cache=False turns caching off even when RESPONSE_CACHE_PATH is set.
+        self.cache = get_default_cache() if cache is None else (cache or None)
+        # Each concurrently crawled window needs its own pooled connection.
+        self._init_session(session, max(pool_size or HTTP_POOL_SIZE, self.window_shards), timeout, max_retries, metrics)
     
-    def get_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50):
+    def _headers(self):
+        return {"accept": "application/json", "X-API-KEY": self.api_key}
+
+    def get_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50, next=None):
         url = f"{self.base_url}/events/chain/{chain}/contract/{contract_address}/nfts/{token_id}"
-        headers = {"accept": "application/json", "X-API-KEY": self.api_key}
+        params = build_events_params(event_types, after, before, limit, next)
+            
+        data = self._get_json(url, self._headers(), params, endpoint='opensea.events')
+        self._record_page('opensea.events', len(data.get('asset_events', [])))
+        return data
+
+    def get_collection_events(self, collection_slug, event_types=None, after=None, before=None, limit=50, next=None):
+        url = f"{self.base_url}/events/collection/{collection_slug}"
+        params = build_events_params(event_types, after, before, limit, next)
+
+        data = self._get_json(url, self._headers(), params, endpoint='opensea.collection')
+        self._record_page('opensea.collection', len(data.get('asset_events', [])))
+        return data
+
+    def get_contract_collection(self, chain, contract_address):
+        # The v2 API has no per-contract events endpoint; contract-wide
+        # history goes through the contract's collection.
+        # Contracts OpenSea has not indexed come back without a collection.
+        url = f"{self.base_url}/chain/{chain}/contract/{contract_address}"
+        collection_slug = self._get_json(url, self._headers(), endpoint='opensea.contract').get('collection')
+        if not collection_slug:
+            raise ValueError(f"OpenSea has no collection for contract {contract_address} on {chain}")
+        return collection_slug
+
+    def _cache_scope(self, chain, contract_address, token_id, event_types):
+        if isinstance(event_types, str):
+            event_types = [event_types]
+        types = ",".join(sorted(event_types or []))
+        return f"opensea|{self.base_url}|{chain}|{contract_address}|{token_id}|{types}"
+
+    def _iter_pages(self, fetch_page, max_pages):
+        # fetch_page(cursor) returns one page of an events endpoint.
+        cursor = None
+        pages = 0
+
+        while True:
+            data = fetch_page(cursor)
+            pages += 1
+            yield data
+
+            cursor = data.get('next')
+            if not cursor or (max_pages is not None and pages >= max_pages):
+                return
+
+    def _iter_window_pages(self, make_fetcher, windows):
+        # Crawls each time window on its own thread and yields one page per
+        # window, newest first. after/before are inclusive, so adjacent
+        # windows share their boundary second; events seen twice there are
+        # dropped.
+        def crawl(window):
+            events = []
+            for data in self._iter_pages(make_fetcher(*window), None):
+                events.extend(data.get('asset_events', []))
+            return events
+
+        with ThreadPoolExecutor(max_workers=len(windows)) as executor:
+            unique = dedupe_windows(executor.map(crawl, windows), opensea_event_key)
+            for index, events in enumerate(unique):
+                yield {'asset_events': events, 'next': 'window' if index < len(windows) - 1 else None}
+
+    def _event_pages(self, make_fetcher, after, before, max_pages, max_events):
+        # make_fetcher(after, before) returns a fetch_page(cursor) function.
+        windows = None
+        if max_pages is None and max_events is None:
+            windows = split_time_window(after, before, self.window_shards)
+        if windows is None:
+            return self._iter_pages(make_fetcher(after, before), max_pages)
+        return self._iter_window_pages(make_fetcher, windows)
+
+    def _nft_page_fetcher(self, chain, contract_address, token_id, event_types, after, before, limit):
+        return lambda cursor: self.get_nft_events(chain, contract_address, token_id, event_types=event_types,
+                                                  after=after, before=before, limit=limit, next=cursor)
+
+    def crawl_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50):
+        # Uncached crawl of every page; returns the events and whether the
+        # last cursor was reached.
+        events = []
+        complete = False
+        make_fetcher = lambda a, b: self._nft_page_fetcher(chain, contract_address, token_id, event_types, a, b, limit)
+        for data in self._event_pages(make_fetcher, after, before, None, None):
+            events.extend(data.get('asset_events', []))
+            complete = not data.get('next')
+        return events, complete
+
+    def iter_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None, limit=50, max_pages=None, max_events=None, bypass_cache=False):
+        scope = self._cache_scope(chain, contract_address, token_id, event_types) if self.cache is not None else None
+        make_fetcher = lambda a, b: self._nft_page_fetcher(chain, contract_address, token_id, event_types, a, b, limit)
+        return self._iter_events(scope, make_fetcher, after, before, max_pages, max_events, bypass_cache)
+
+    def iter_collection_events(self, collection_slug, event_types=None, after=None, before=None, limit=50, max_pages=None, max_events=None, bypass_cache=False):
+        scope = None
+        if self.cache is not None:
+            scope = self._cache_scope('collection', collection_slug, None, event_types)
+        make_fetcher = lambda a, b: (lambda cursor: self.get_collection_events(collection_slug, event_types=event_types,
+                                                                              after=a, before=b, limit=limit, next=cursor))
+        return self._iter_events(scope, make_fetcher, after, before, max_pages, max_events, bypass_cache)
+
+    def _iter_events(self, scope, make_fetcher, after, before, max_pages, max_events, bypass_cache):
+        # make_fetcher(after, before) returns a fetch_page(cursor) function.
+        prefix = []
+        fetch_from = after
+        if scope is not None:
+            cached = None if bypass_cache else self.cache.lookup_prefix(scope, after, before)
+            if self.metrics is not None:
+                self.metrics.incr('opensea.cache_hit' if cached is not None else 'opensea.cache_miss')
+            if cached is not None:
+                # The cached window may be wider than this request.
+                events, settled_end = cached
+                events = [
+                    event for event in events
+                    if (after is None or event.get('event_timestamp', 0) >= after)
+                    and (before is None or event.get('event_timestamp', 0) <= before)
+                ]
+                if settled_end is None:
+                    yield from events[:max_events]
+                    return
+                # Only the history after the settled part of a stale entry is
+                # fetched again and the rest is taken from the cache.
+                prefix = [event for event in events if event.get('event_timestamp', 0) <= settled_end]
+                fetch_from = settled_end
+
+        # Only an uncapped crawl that reached the last cursor is cached, which
+        # means holding on to the events until then.
+        collected = [] if scope is not None and max_pages is None and max_events is None else None
+        fetched = set()
+        yielded = 0
+        complete = False
+
+        for data in self._event_pages(make_fetcher, fetch_from, before, max_pages, max_events):
+            for event in data.get('asset_events', []):
+                if max_events is not None and yielded >= max_events:
+                    return
+                yield event
+                yielded += 1
+                if prefix:
+                    fetched.add(opensea_event_key(event))
+                if collected is not None:
+                    collected.append(event)
+            complete = not data.get('next')
+
+        if prefix and not complete:
+            return
+        # The refetched range starts at whole seconds, so it can overlap the
+        # cached part.
+        for event in prefix:
+            if opensea_event_key(event) in fetched:
+                continue
+            if max_events is not None and yielded >= max_events:
+                return
+            yield event
+            yielded += 1
+            if collected is not None:
+                collected.append(event)
+
+        if collected is not None and complete:
+            self.cache.store(scope, after, before, collected)
+
+    def iter_contract_nfts(self, chain, contract_address, limit=200):
+        url = f"{self.base_url}/chain/{chain}/contract/{contract_address}/nfts"
         params = {"limit": limit}
 
-        if event_types:
-            if isinstance(event_types, str):
-                params["event_type"] = event_types
-        elif isinstance(event_types, list):
-            params["event_type"] = ",".join(event_types)
-        
-        if after is not None:
-            params["after"] = int(after)
-        if before is not None:
-            params["before"] = int(before)
-            
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error: {response.status_code}")
-            print(response.text)
-            return None
\ No newline at end of file
+        while True:
+            data = self._get_json(url, self._headers(), params, endpoint='opensea.nfts')
+            self._record_page('opensea.nfts', len(data.get('nfts', [])))
+            yield from data.get('nfts', [])
+
+            cursor = data.get('next')
+            if not cursor:
+                return
+            params["next"] = cursor
@@ -0,0 +1,130 @@
+import time
+import threading
+from urllib.parse import urlparse
+from config.settings import (
+    LOOTEX_API_URL, OPENSEA_API_URL, LOOTEX_RATE_LIMIT, OPENSEA_RATE_LIMIT, DEFAULT_RATE_LIMIT
+)
+
+HOST_RATE_LIMITS = {
+    urlparse(LOOTEX_API_URL).hostname: LOOTEX_RATE_LIMIT,
+    urlparse(OPENSEA_API_URL).hostname: OPENSEA_RATE_LIMIT,
+}
+
+class TokenBucket:
+    # Allows `rate` requests per second with bursts of up to `capacity`.
+    # The rate adapts AIMD-style: it is halved whenever the server throttles
+    # us and creeps back towards the configured ceiling on every success, so
+    # a run settles just below the highest rate the server will sustain.
+    def __init__(self, rate, capacity=None, min_rate=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 16
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        # Takes a token, letting the balance go negative, and returns how long
+        # the caller has to wait for it. Reservations are first come, first
+        # served, so concurrent callers are spaced 1/rate apart.
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        # Imported here so the threaded clients do not load asyncio.
+        import asyncio
+
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self):
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+class SharedTokenBucket(TokenBucket):
+    # A TokenBucket whose balance, refill clock and adapted rate live in
+    # shared memory behind a process-shared lock, so worker processes draw
+    # from one budget per host and a 429 seen by one slows all of them down.
+    # time.monotonic() is system-wide, so the refill arithmetic holds across
+    # processes. Must reach the workers when they start (e.g. through a
+    # pool initializer).
+    def __init__(self, rate, capacity=None, min_rate=None, context=None):
+        # Imported here so single-process runs do not load multiprocessing.
+        import multiprocessing
+
+        context = context or multiprocessing.get_context()
+        self._state = context.RawArray('d', 3)
+        super().__init__(rate, capacity, min_rate)
+        self._lock = context.Lock()
+
+    @property
+    def tokens(self):
+        return self._state[0]
+
+    @tokens.setter
+    def tokens(self, value):
+        self._state[0] = value
+
+    @property
+    def updated(self):
+        return self._state[1]
+
+    @updated.setter
+    def updated(self, value):
+        self._state[1] = value
+
+    @property
+    def rate(self):
+        return self._state[2]
+
+    @rate.setter
+    def rate(self, value):
+        self._state[2] = value
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(url):
+    # One bucket per host, shared by every client in the process.
+    host = urlparse(url).hostname
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = TokenBucket(HOST_RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+            _limiters[host] = limiter
+        return limiter
+
+def reset_rate_limiters():
+    # Drops every bucket, so the next request per host starts again at the
+    # configured rate (e.g. between benchmark runs).
+    with _limiters_lock:
+        _limiters.clear()
+
+def create_shared_rate_limiters(context=None):
+    # A SharedTokenBucket for every configured host, to hand to
+    # install_rate_limiters() in each worker process. Other hosts keep a
+    # bucket per process.
+    return {host: SharedTokenBucket(rate, context=context) for host, rate in HOST_RATE_LIMITS.items()}
+
+def install_rate_limiters(limiters):
+    # Makes get_rate_limiter() return these buckets for their hosts.
+    with _limiters_lock:
+        _limiters.update(limiters)
@@ -0,0 +1,217 @@
+import heapq
+from itertools import count
+from src.normalize import EVENT_TYPES, MISSING_TIME, format_price, format_timestamp
+
+# Columns compared for events found on both marketplaces. OpenSea transfers
+# carry no price, and cancels only tell us when they happened.
+COMPARED_FIELDS = {
+    'listing': ('timestamp', 'expiration', 'price', 'currency', 'quantity', 'from_address'),
+    'cancel': ('timestamp',),
+    'sale': ('timestamp', 'quantity', 'from_address', 'to_address'),
+}
+
+# Default for stream_reconcile: how far, in seconds, an event's counterpart
+# may trail it in the other stream before it is reported as missing.
+STREAM_WINDOW_SECONDS = 86400
+
+class Tolerances:
+    # price_decimals: prices are compared after rounding to this many decimals.
+    # timestamp_offset: seconds added to OpenSea times before comparing, for a
+    #     source with a known constant shift (like the +8h display offset).
+    # timestamp_skew: largest difference, in seconds, still treated as equal.
+    __slots__ = ('price_decimals', 'timestamp_offset', 'timestamp_skew')
+
+    def __init__(self, price_decimals=6, timestamp_offset=0, timestamp_skew=0):
+        self.price_decimals = price_decimals
+        self.timestamp_offset = timestamp_offset
+        self.timestamp_skew = timestamp_skew
+
+class FieldDiff:
+    __slots__ = ('event_type', 'txhash', 'field', 'lootex_value', 'opensea_value')
+
+    def __init__(self, event_type, txhash, field, lootex_value, opensea_value):
+        self.event_type = event_type
+        self.txhash = txhash
+        self.field = field
+        self.lootex_value = lootex_value
+        self.opensea_value = opensea_value
+
+    def to_dict(self):
+        return {
+            'event_type': self.event_type,
+            'txhash': self.txhash,
+            'field': self.field,
+            'lootex_value': self.lootex_value,
+            'opensea_value': self.opensea_value
+        }
+
+class ReconcileResult:
+    # lootex_index/opensea_index map txhash -> row in the respective batch.
+    __slots__ = ('event_type', 'lootex_index', 'opensea_index', 'matching', 'lootex_only', 'opensea_only', 'diffs')
+
+    def __init__(self, event_type, lootex_index, opensea_index):
+        self.event_type = event_type
+        self.lootex_index = lootex_index
+        self.opensea_index = opensea_index
+        self.matching = lootex_index.keys() & opensea_index.keys()
+        self.lootex_only = lootex_index.keys() - opensea_index.keys()
+        self.opensea_only = opensea_index.keys() - lootex_index.keys()
+        self.diffs = []
+
+    def to_dict(self):
+        return {
+            'event_type': self.event_type,
+            'matching': len(self.matching),
+            'lootex_only': sorted(self.lootex_only),
+            'opensea_only': sorted(self.opensea_only),
+            'field_diffs': [diff.to_dict() for diff in self.diffs]
+        }
+
+def _rescale(raw, decimals, target):
+    # Rounds raw / 10**decimals to `target` decimals, half away from zero.
+    if decimals <= target:
+        return raw * 10 ** (target - decimals)
+    divisor = 10 ** (decimals - target)
+    quotient, remainder = divmod(abs(raw), divisor)
+    if remainder * 2 >= divisor:
+        quotient += 1
+    return -quotient if raw < 0 else quotient
+
+def _same_text(a, b):
+    # Unknown values on either side are not reported as differences.
+    if a is None or b is None:
+        return True
+    return a.lower() == b.lower()
+
+def _compare_row(event_type, txhash, fields, lootex, i, opensea, j, tolerances, diffs):
+    for field in fields:
+        if field == 'timestamp' or field == 'expiration':
+            a = getattr(lootex, field)[i]
+            b = getattr(opensea, field)[j]
+            if a == MISSING_TIME or b == MISSING_TIME:
+                continue
+            if abs(a - (b + tolerances.timestamp_offset)) > tolerances.timestamp_skew:
+                diffs.append(FieldDiff(event_type, txhash, field, format_timestamp(a), format_timestamp(b)))
+        elif field == 'price':
+            a_raw, a_dec = lootex.price_raw[i], lootex.price_decimals[i]
+            b_raw, b_dec = opensea.price_raw[j], opensea.price_decimals[j]
+            # A missing price normalizes to 0, so like quantity it is only
+            # compared when both sides have one.
+            if a_raw and b_raw and _rescale(a_raw, a_dec, tolerances.price_decimals) != _rescale(b_raw, b_dec, tolerances.price_decimals):
+                diffs.append(FieldDiff(event_type, txhash, field, format_price(a_raw, a_dec), format_price(b_raw, b_dec)))
+        elif field == 'quantity':
+            a, b = lootex.quantity[i], opensea.quantity[j]
+            if a and b and a != b:
+                diffs.append(FieldDiff(event_type, txhash, field, a, b))
+        else:
+            a, b = getattr(lootex, field)[i], getattr(opensea, field)[j]
+            if not _same_text(a, b):
+                diffs.append(FieldDiff(event_type, txhash, field, a, b))
+
+def reconcile(lootex_batch, opensea_batch, event_type, tolerances=None, fields=None):
+    # Hash join on txhash (order hash for listings and cancels), then a
+    # column-by-column check of every matched pair: O(n + m) overall.
+    tolerances = tolerances or Tolerances()
+    fields = COMPARED_FIELDS[event_type] if fields is None else fields
+
+    lootex_index = {lootex_batch.txhash[i]: i for i in lootex_batch.indices(event_type)}
+    opensea_index = {opensea_batch.txhash[i]: i for i in opensea_batch.indices(event_type)}
+    result = ReconcileResult(event_type, lootex_index, opensea_index)
+
+    for txhash, i in lootex_index.items():
+        j = opensea_index.get(txhash)
+        if j is not None:
+            _compare_row(event_type, txhash, fields, lootex_batch, i, opensea_batch, j, tolerances, result.diffs)
+
+    return result
+
+class _StreamSide:
+    # pending: (event type code, txhash) -> (batch, row) of unmatched events.
+    # heap: (-time, seq, key) for the dated ones, newest first, which is the
+    # order they expire in. watermark is the oldest time read so far.
+    __slots__ = ('chunks', 'offset', 'kind', 'watermark', 'pending', 'heap', 'done')
+
+    def __init__(self, chunks, offset, kind):
+        self.chunks = iter(chunks)
+        self.offset = offset
+        self.kind = kind
+        self.watermark = float('inf')
+        self.pending = {}
+        self.heap = []
+        self.done = False
+
+def stream_reconcile(lootex_chunks, opensea_chunks, tolerances=None, window_seconds=STREAM_WINDOW_SECONDS):
+    # Merge-join of two streams of EventBatch chunks, each ordered newest
+    # first as the APIs page them. Yields (kind, event_type, txhash, diffs)
+    # as events are resolved: kind is 'matching' (diffs holds the pair's
+    # FieldDiffs), 'lootex_only' or 'opensea_only' (diffs is empty).
+    #
+    # An unmatched event is held until the other stream has moved more than
+    # window_seconds past it, so memory follows the events in one window
+    # rather than the whole history. The window has to cover how far apart
+    # the two marketplaces' times for one event, and each stream's own
+    # ordering, can drift; a pair further apart is reported as missing on
+    # both sides. Events without a time are held until the end.
+    tolerances = tolerances or Tolerances()
+    lootex = _StreamSide(lootex_chunks, 0, 'lootex_only')
+    opensea = _StreamSide(opensea_chunks, tolerances.timestamp_offset, 'opensea_only')
+    # Recently matched keys, so an entry repeated across a page boundary is
+    # not reported again as missing.
+    resolved = set()
+    resolved_heap = []
+    sequence = count()
+
+    while not (lootex.done and opensea.done):
+        # Read from whichever stream is further behind (the newer watermark),
+        # so both advance through time together.
+        if opensea.done or (not lootex.done and lootex.watermark >= opensea.watermark):
+            side, other = lootex, opensea
+        else:
+            side, other = opensea, lootex
+
+        batch = next(side.chunks, None)
+        if batch is None:
+            side.done = True
+            side.watermark = float('-inf')
+        else:
+            for i in range(len(batch)):
+                key = (batch.event_type[i], batch.txhash[i])
+                at = batch.timestamp[i]
+                dated = at != MISSING_TIME
+                if dated:
+                    at += side.offset
+                    side.watermark = min(side.watermark, at)
+                if key in resolved or key in side.pending:
+                    continue
+
+                match = other.pending.pop(key, None)
+                if match is None:
+                    side.pending[key] = (batch, i)
+                    if dated:
+                        heapq.heappush(side.heap, (-at, next(sequence), key))
+                    continue
+
+                event_type = EVENT_TYPES[key[0]]
+                lootex_row, opensea_row = ((batch, i), match) if side is lootex else (match, (batch, i))
+                diffs = []
+                _compare_row(event_type, key[1], COMPARED_FIELDS[event_type], *lootex_row, *opensea_row,
+                             tolerances, diffs)
+                yield 'matching', event_type, key[1], diffs
+                if dated:
+                    resolved.add(key)
+                    heapq.heappush(resolved_heap, (-at, next(sequence), key))
+
+        for side, other in ((lootex, opensea), (opensea, lootex)):
+            horizon = other.watermark + window_seconds
+            while side.heap and -side.heap[0][0] > horizon:
+                key = heapq.heappop(side.heap)[2]
+                if side.pending.pop(key, None) is not None:
+                    yield side.kind, EVENT_TYPES[key[0]], key[1], []
+
+        horizon = max(lootex.watermark, opensea.watermark) + window_seconds
+        while resolved_heap and -resolved_heap[0][0] > horizon:
+            resolved.discard(heapq.heappop(resolved_heap)[2])
+
+    for side in (lootex, opensea):
+        for key in side.pending:
+            yield side.kind, EVENT_TYPES[key[0]], key[1], []
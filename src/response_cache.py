@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from config.settings import RESPONSE_CACHE_PATH, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_SETTLE_SECONDS
+
+_default_cache = None
+
+def get_default_cache():
+    # The cache is opt-in: it is only enabled when RESPONSE_CACHE_PATH is set.
+    global _default_cache
+    if _default_cache is None and RESPONSE_CACHE_PATH:
+        _default_cache = ResponseCache(RESPONSE_CACHE_PATH)
+    return _default_cache
+
+class ResponseCache:
+    # Stores the complete event list fetched for a (marketplace, chain,
+    # contract, token, query) scope and time window. Entries younger than ttl
+    # are served as-is. Older entries are still served for the part of their
+    # window that ended settle_seconds before they were fetched, because
+    # history that old no longer changes. A request for a narrower window is
+    # answered from any entry whose window covers it, and lookup_prefix also
+    # returns an entry covering only the start of the request.
+    def __init__(self, path, ttl=None, max_bytes=None, settle_seconds=None):
+        self.path = path
+        self.ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.max_bytes = RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.settle_seconds = RESPONSE_CACHE_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY,
+                scope TEXT NOT NULL,
+                window_start REAL NOT NULL,
+                window_end REAL NOT NULL,
+                open_ended INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses (scope, window_start)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (accessed_at)")
+        self._conn.commit()
+
+    def _usable_end(self, window_end, open_ended, created_at, now):
+        if now - created_at < self.ttl:
+            return now if open_ended else window_end
+        return min(window_end, created_at - self.settle_seconds)
+
+    def lookup(self, scope, start=None, end=None, now=None):
+        cached = self.lookup_prefix(scope, start, end, now)
+        if cached is None or cached[1] is not None:
+            return None
+        return cached[0]
+
+    def lookup_prefix(self, scope, start=None, end=None, now=None):
+        # Returns (events, fetch_from). fetch_from is None when an entry covers
+        # the whole request. Otherwise the events only cover the request up to
+        # fetch_from and the caller has to fetch the rest, e.g. when an
+        # open-ended entry has outlived its ttl and only its settled part is
+        # still trusted.
+        now = time.time() if now is None else now
+        start = 0 if start is None else start
+        request_end = now if end is None else end
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, window_start, window_end, open_ended, created_at, payload FROM responses "
+                "WHERE scope = ? AND window_start <= ? ORDER BY created_at DESC",
+                (scope, start)
+            ).fetchall()
+
+            expired = []
+            hit = None
+            for row_id, window_start, window_end, open_ended, created_at, payload in rows:
+                usable_end = self._usable_end(window_end, open_ended, created_at, now)
+                if usable_end <= window_start:
+                    expired.append((row_id,))
+                    continue
+                if usable_end <= start:
+                    continue
+                # Prefer an entry covering the whole request, then the one
+                # covering the longest prefix of it.
+                fetch_from = None if request_end <= usable_end else usable_end
+                if hit is None or (hit[1] is not None and (fetch_from is None or fetch_from > hit[1])):
+                    hit = (row_id, fetch_from, payload)
+
+            if expired:
+                self._conn.executemany("DELETE FROM responses WHERE id = ?", expired)
+            if hit is not None:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE id = ?", (now, hit[0]))
+            self._conn.commit()
+
+        if hit is None:
+            return None
+        return json.loads(zlib.decompress(hit[2])), hit[1]
+
+    def store(self, scope, start, end, events, now=None):
+        now = time.time() if now is None else now
+        window_start = 0 if start is None else start
+        window_end = now if end is None else end
+        payload = zlib.compress(json.dumps(events, separators=(',', ':')).encode())
+
+        with self._lock:
+            # A new entry supersedes any older one for a window it contains.
+            self._conn.execute(
+                "DELETE FROM responses WHERE scope = ? AND window_start >= ? AND window_end <= ?",
+                (scope, window_start, window_end)
+            )
+            self._conn.execute(
+                "INSERT INTO responses (scope, window_start, window_end, open_ended, created_at, accessed_at, size, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (scope, window_start, window_end, int(end is None), now, now, len(payload), payload)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row_id, size in self._conn.execute("SELECT id, size FROM responses ORDER BY accessed_at").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE id = ?", (row_id,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
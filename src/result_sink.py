@@ -0,0 +1,209 @@
+import csv
+import json
+import threading
+from collections import defaultdict
+
+RESULT_FIELDS = [
+    'chain', 'contract_address', 'token_id', 'event_type', 'kind',
+    'txhash', 'field', 'lootex_value', 'opensea_value', 'error'
+]
+
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+def iter_result_rows(token_result):
+    # Flattens one compare_token result (as produced by the batch runner)
+    # into one row per finding: unmatched events, field differences, or the
+    # error that stopped the token.
+    token = {
+        'chain': token_result.get('chain'),
+        'contract_address': token_result.get('contract_address'),
+        'token_id': token_result.get('token_id'),
+    }
+
+    if token_result.get('status') == 'error':
+        yield {**token, 'kind': 'error', 'error': token_result.get('error')}
+        return
+
+    for result in token_result.get('results', []):
+        event_type = result['event_type']
+        for txhash in result['lootex_only']:
+            yield {**token, 'event_type': event_type, 'kind': 'lootex_only', 'txhash': txhash}
+        for txhash in result['opensea_only']:
+            yield {**token, 'event_type': event_type, 'kind': 'opensea_only', 'txhash': txhash}
+        for diff in result.get('field_diffs', []):
+            yield {**token, 'event_type': event_type, 'kind': 'field_diff', 'txhash': diff['txhash'],
+                   'field': diff['field'], 'lootex_value': diff['lootex_value'], 'opensea_value': diff['opensea_value']}
+
+class ResultSink:
+    # Receives one result per compared token. Row-oriented outputs override
+    # write_row; sinks that aggregate whole tokens (SummaryReport,
+    # CheckpointSink) override write_token instead. The base class discards
+    # rows, so a sink only implements the hook it needs.
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def write_token(self, token_result):
+        with self._lock:
+            for row in iter_result_rows(token_result):
+                self.write_row(row)
+
+    def write_row(self, row):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonlSink(ResultSink):
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'w', buffering=OUTPUT_BUFFER_SIZE)
+
+    def write_row(self, row):
+        self.file.write(json.dumps(row, separators=(',', ':'), default=str))
+        self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+class CsvSink(ResultSink):
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'w', newline='', buffering=OUTPUT_BUFFER_SIZE)
+        self.writer = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS)
+        self.writer.writeheader()
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+class SummaryReport(ResultSink):
+    # Counts per event type, overall and per token; written as JSON on close
+    # when a path is given.
+    COUNTERS = ('matching', 'lootex_only', 'opensea_only', 'field_diffs')
+
+    def __init__(self, path=None):
+        super().__init__()
+        self.path = path
+        self.tokens = 0
+        self.errors = 0
+        self.by_event_type = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+        self.by_token = {}
+
+    def write_token(self, token_result):
+        key = f"{token_result.get('chain')}:{token_result.get('contract_address')}:{token_result.get('token_id')}"
+        with self._lock:
+            self.tokens += 1
+            if token_result.get('status') == 'error':
+                self.errors += 1
+                self.by_token[key] = {'status': 'error', 'error': token_result.get('error')}
+                return
+
+            token_counts = {}
+            for result in token_result.get('results', []):
+                counts = {
+                    'matching': result['matching'],
+                    'lootex_only': len(result['lootex_only']),
+                    'opensea_only': len(result['opensea_only']),
+                    'field_diffs': len(result.get('field_diffs', [])),
+                }
+                totals = self.by_event_type[result['event_type']]
+                for name, value in counts.items():
+                    totals[name] += value
+                token_counts[result['event_type']] = counts
+            self.by_token[key] = {'status': 'ok', 'counts': token_counts}
+
+    def to_dict(self):
+        return {
+            'tokens': self.tokens,
+            'errors': self.errors,
+            'by_event_type': dict(self.by_event_type),
+            'by_token': self.by_token,
+        }
+
+    def print(self):
+        print(f"\nTokens compared: {self.tokens} ({self.errors} errors)")
+        print(f"{'event type':<10} " + " ".join(f"{name:>13}" for name in self.COUNTERS))
+        for event_type, totals in self.by_event_type.items():
+            print(f"{event_type:<10} " + " ".join(f"{totals[name]:>13}" for name in self.COUNTERS))
+
+    def close(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.to_dict(), f, indent=2)
+
+class MultiSink(ResultSink):
+    def __init__(self, sinks):
+        super().__init__()
+        self.sinks = sinks
+
+    def write_token(self, token_result):
+        for sink in self.sinks:
+            sink.write_token(token_result)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+def checkpoint_key(token):
+    # Identifies a token (and its time range) across runs; token IDs may be
+    # strings in a CSV and numbers in JSONL.
+    return tuple(None if token.get(field) is None else str(token.get(field))
+                 for field in ('chain', 'contract_address', 'token_id', 'start_time', 'end_time'))
+
+def load_checkpoint(path):
+    # checkpoint_key -> token result for every token a CheckpointSink at
+    # `path` recorded. A missing file means nothing is done yet, and a line
+    # cut short by an interrupted run is ignored.
+    done = {}
+    try:
+        f = open(path)
+    except FileNotFoundError:
+        return done
+    with f:
+        for line in f:
+            try:
+                token_result = json.loads(line)
+            except ValueError:
+                continue
+            done[checkpoint_key(token_result)] = token_result
+    return done
+
+class CheckpointSink(ResultSink):
+    # Appends each successfully compared token's full result to a JSONL file
+    # and flushes it, so an interrupted run can resume from load_checkpoint()
+    # and replay those results instead of fetching them again. Failed tokens
+    # are not recorded, so a resumed run retries them.
+    def __init__(self, path):
+        super().__init__()
+        self.file = open(path, 'a+')
+        # Start on a fresh line if the last run died mid-write.
+        if self.file.tell() > 0:
+            self.file.seek(self.file.tell() - 1)
+            if self.file.read(1) != '\n':
+                self.file.write('\n')
+
+    def write_token(self, token_result):
+        if token_result.get('status') != 'ok':
+            return
+        line = json.dumps(token_result, separators=(',', ':'), default=str)
+        with self._lock:
+            self.file.write(line)
+            self.file.write('\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def open_sink(path):
+    # Picks the writer from the file extension; JSONL is the default.
+    if path.endswith('.csv'):
+        return CsvSink(path)
+    return JsonlSink(path)
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+# Windows shorter than this are not worth a separate crawl.
+MIN_WINDOW_SECONDS = 3600
+
+def split_time_window(start, end, shards):
+    # Splits [start, end] (datetimes or epoch seconds) into up to `shards`
+    # equal windows, newest first to match the APIs' ordering. Returns None
+    # when the range is open-ended or too short to split.
+    if shards <= 1 or start is None or end is None:
+        return None
+    span = end - start
+    seconds = span.total_seconds() if isinstance(span, timedelta) else span
+    shards = min(shards, int(seconds // MIN_WINDOW_SECONDS))
+    if shards <= 1:
+        return None
+
+    # Whole-second bounds, so the APIs see plain timestamps.
+    step = int(seconds // shards)
+    if isinstance(span, timedelta):
+        step = timedelta(seconds=step)
+    bounds = [start + step * i for i in range(shards)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in reversed(range(shards))]
+
+def dedupe_windows(window_events, key_fn):
+    # Yields each window's events (newest window first) without the ones an
+    # overlapping window edge already returned.
+    seen = set()
+    for events in window_events:
+        unique = []
+        for event in events:
+            key = key_fn(event)
+            if key not in seen:
+                seen.add(key)
+                unique.append(event)
+        yield unique
@@ -0,0 +1,406 @@
+import sys
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.settings import LOOTEX_MAX_WORKERS, ASYNC_MAX_CONCURRENCY, HISTORY_WINDOW_SHARDS
+from src.lootex_client import LootexClient
+from src.opensea_client import OpenSeaClient
+from src.incremental_sync import SyncStore
+from src.event_store import EventStore
+from src.reconcile import STREAM_WINDOW_SECONDS, Tolerances
+from src.rate_limit import create_shared_rate_limiters, install_rate_limiters
+from src.result_sink import CheckpointSink, MultiSink, SummaryReport, checkpoint_key, load_checkpoint, open_sink
+from src.metrics import Metrics
+from src.compare import (
+    compare_token, compare_token_async, compare_token_streaming, fetch_contract_events, get_chain_info
+)
+
+TOKEN_FIELDS = ['chain', 'contract_address', 'token_id', 'start_time', 'end_time']
+
+# Seconds between progress lines with --progress.
+PROGRESS_INTERVAL = 5.0
+
+def load_tokens(path):
+    if path.endswith('.jsonl'):
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+
+    return [{field: row.get(field) or None for field in TOKEN_FIELDS} for row in rows]
+
+def list_contract_tokens(chain_input, contract_address, opensea_client, start_time=None, end_time=None):
+    _, opensea_chain = get_chain_info(chain_input)
+    return [
+        {
+            'chain': chain_input,
+            'contract_address': contract_address,
+            'token_id': nft['identifier'],
+            'start_time': start_time,
+            'end_time': end_time
+        }
+        for nft in opensea_client.iter_contract_nfts(opensea_chain, contract_address)
+    ]
+
+def token_group(token):
+    # Tokens that can share one contract-wide fetch.
+    return token['chain'], token['contract_address'], token['start_time'], token['end_time']
+
+def fetch_bulk_events(tokens, lootex_client, opensea_client):
+    # token_group -> ContractEvents, or the exception that stopped that
+    # group's crawl. Every group is held in memory until the batch ends.
+    groups = {}
+    for token in tokens:
+        key = token_group(token)
+        if key not in groups:
+            try:
+                groups[key] = fetch_contract_events(*key, lootex_client=lootex_client, opensea_client=opensea_client)
+            except Exception as e:
+                groups[key] = e
+    return groups
+
+def compare_token_safe(token, lootex_client, opensea_client, sync_store=None, tolerances=None, metrics=None,
+                       contract_events=None, event_store=None, from_store=False, stream_window=None):
+    started = time.perf_counter()
+    result = dict(token)
+    try:
+        if isinstance(contract_events, Exception):
+            raise contract_events
+        if stream_window is not None:
+            result['results'] = compare_token_streaming(token['chain'], token['contract_address'], token['token_id'],
+                                                        token['start_time'], token['end_time'],
+                                                        lootex_client=lootex_client, opensea_client=opensea_client,
+                                                        verbose=False, tolerances=tolerances,
+                                                        window_seconds=stream_window, metrics=metrics)
+        else:
+            result['results'] = compare_token(token['chain'], token['contract_address'], token['token_id'],
+                                              token['start_time'], token['end_time'],
+                                              lootex_client=lootex_client, opensea_client=opensea_client,
+                                              verbose=False, sync_store=sync_store, tolerances=tolerances,
+                                              metrics=metrics, contract_events=contract_events,
+                                              event_store=event_store, from_store=from_store)
+        result['status'] = 'ok'
+    except Exception as e:
+        # One broken token must not abort a nightly run of thousands.
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
+
+async def compare_token_safe_async(token, lootex_client, opensea_client, tolerances=None, metrics=None):
+    started = time.perf_counter()
+    result = dict(token)
+    try:
+        result['results'] = await compare_token_async(token['chain'], token['contract_address'], token['token_id'],
+                                                      token['start_time'], token['end_time'],
+                                                      lootex_client=lootex_client, opensea_client=opensea_client,
+                                                      verbose=False, tolerances=tolerances, metrics=metrics)
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'error'
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsed'] = round(time.perf_counter() - started, 3)
+    return result
+
+def result_events(result):
+    # Events compared for one token: matched pairs count once.
+    return sum(counts['matching'] + len(counts['lootex_only']) + len(counts['opensea_only'])
+               for counts in result.get('results', []))
+
+class BatchWriter:
+    # total and progress: print tokens done, throughput and an ETA to stderr
+    # every PROGRESS_INTERVAL seconds and when the last token is written.
+    def __init__(self, sink, total=None, progress=False):
+        self.sink = sink
+        self.total = total
+        self.progress = progress
+        self.succeeded = 0
+        self.failed = 0
+        self.events = 0
+        self.started = time.perf_counter()
+        self.last_progress = self.started
+
+    def write(self, result):
+        self.sink.write_token(result)
+        if result['status'] == 'ok':
+            self.succeeded += 1
+            self.events += result_events(result)
+        else:
+            self.failed += 1
+            print(f"Error for token {result['token_id']}: {result['error']}")
+        if self.progress:
+            self.report_progress()
+
+    def report_progress(self):
+        now = time.perf_counter()
+        done = self.succeeded + self.failed
+        if now - self.last_progress < PROGRESS_INTERVAL and done != self.total:
+            return
+        self.last_progress = now
+        elapsed = now - self.started
+        tokens_per_sec = done / elapsed if elapsed > 0 else 0.0
+        events_per_sec = self.events / elapsed if elapsed > 0 else 0.0
+        line = f"[{done}/{self.total or '?'}] {tokens_per_sec:.2f} tokens/sec, {events_per_sec:.0f} events/sec"
+        if self.total and tokens_per_sec > 0:
+            eta = (self.total - done) / tokens_per_sec
+            line += f", {done / self.total:.1%} done, ETA {timedelta(seconds=round(eta))}"
+        print(line, file=sys.stderr, flush=True)
+
+    def summary(self):
+        total = self.succeeded + self.failed
+        elapsed = time.perf_counter() - self.started
+        throughput = total / elapsed if elapsed > 0 else 0.0
+        print(f"Compared {total} tokens in {elapsed:.1f}s ({throughput:.2f} tokens/sec), "
+              f"{self.succeeded} succeeded, {self.failed} failed")
+        return {'tokens': total, 'succeeded': self.succeeded, 'failed': self.failed,
+                'elapsed': elapsed, 'tokens_per_sec': throughput}
+
+def run_batch(tokens, sink, max_workers=8, lootex_client=None, opensea_client=None, use_cache=True, sync_store=None,
+              tolerances=None, metrics=None, bulk=False, window_shards=None, event_store=None, from_store=False,
+              stream_window=None, progress=False):
+    # bulk: fetch each contract's history once and compare its tokens from
+    # that, instead of crawling every token separately.
+    # from_store: compare only what event_store already holds; no clients
+    # are used.
+    # stream_window: compare each token with compare_token_streaming and
+    # this window, in seconds; the response cache and window shards are
+    # skipped.
+    owns_clients = lootex_client is None
+    if owns_clients:
+        # Token workers each run their own Lootex page workers, so size the
+        # pools for every connection that can be in flight at once.
+        cache = None if use_cache and stream_window is None else False
+        window_shards = 1 if stream_window is not None else window_shards or HISTORY_WINDOW_SHARDS
+        lootex_client = LootexClient(pool_size=max_workers * LOOTEX_MAX_WORKERS * window_shards, cache=cache,
+                                     metrics=metrics, window_shards=window_shards)
+        opensea_client = OpenSeaClient(pool_size=max_workers * window_shards, cache=cache, metrics=metrics,
+                                       window_shards=window_shards)
+
+    try:
+        groups = {}
+        if bulk:
+            started = time.perf_counter()
+            groups = fetch_bulk_events(tokens, lootex_client, opensea_client)
+            if metrics is not None:
+                metrics.add_stage('bulk_fetch', time.perf_counter() - started)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            writer = BatchWriter(sink, len(tokens), progress)
+            futures = [
+                executor.submit(compare_token_safe, token, lootex_client, opensea_client, sync_store, tolerances, metrics,
+                                groups.get(token_group(token)), event_store, from_store, stream_window)
+                for token in tokens
+            ]
+            for future in as_completed(futures):
+                writer.write(future.result())
+    finally:
+        if owns_clients:
+            lootex_client.close()
+            opensea_client.close()
+
+    return writer.summary()
+
+async def run_batch_async(tokens, sink, max_concurrency=ASYNC_MAX_CONCURRENCY, lootex_client=None, opensea_client=None,
+                          tolerances=None, metrics=None, progress=False):
+    # Imported here so the threaded mode does not require aiohttp.
+    from src.async_clients import AsyncLootexClient, AsyncOpenSeaClient
+
+    owns_clients = lootex_client is None
+    if owns_clients:
+        # A single semaphore bounds the requests in flight across both
+        # marketplaces and every token.
+        semaphore = asyncio.Semaphore(max_concurrency)
+        lootex_client = AsyncLootexClient(semaphore=semaphore, pool_size=max_concurrency, metrics=metrics)
+        opensea_client = AsyncOpenSeaClient(semaphore=semaphore, pool_size=max_concurrency, metrics=metrics)
+
+    try:
+        writer = BatchWriter(sink, len(tokens), progress)
+        pending = [compare_token_safe_async(token, lootex_client, opensea_client, tolerances, metrics) for token in tokens]
+        for next_result in asyncio.as_completed(pending):
+            writer.write(await next_result)
+    finally:
+        if owns_clients:
+            await lootex_client.close()
+            await opensea_client.close()
+
+    return writer.summary()
+
+# Per-process state of run_batch_processes workers, set by _init_worker.
+_worker = {}
+
+def _init_worker(rate_limiters, use_cache, tolerances, window_shards, stream_window, sync_store_path,
+                 event_store_path, from_store):
+    install_rate_limiters(rate_limiters)
+    cache = None if use_cache and stream_window is None else False
+    window_shards = 1 if stream_window is not None else window_shards
+    _worker.update(
+        lootex_client=LootexClient(cache=cache, window_shards=window_shards),
+        opensea_client=OpenSeaClient(cache=cache, window_shards=window_shards),
+        sync_store=SyncStore(sync_store_path or None) if sync_store_path is not None else None,
+        event_store=EventStore(event_store_path) if event_store_path is not None else None,
+        tolerances=tolerances,
+        stream_window=stream_window,
+        from_store=from_store,
+    )
+
+def _compare_in_worker(token):
+    return compare_token_safe(token, _worker['lootex_client'], _worker['opensea_client'], _worker['sync_store'],
+                              _worker['tolerances'], event_store=_worker['event_store'],
+                              from_store=_worker['from_store'], stream_window=_worker['stream_window'])
+
+def run_batch_processes(tokens, sink, processes, use_cache=True, tolerances=None, window_shards=None,
+                        stream_window=None, sync_store_path=None, event_store_path=None, from_store=False,
+                        progress=False):
+    # Spreads tokens over worker processes, one token per task, for runs
+    # where parsing and diffing keep a single interpreter busy. Each worker
+    # has its own clients, plus its own SyncStore/EventStore when a path is
+    # given ('' for the default path), and every process draws from the
+    # same per-host rate budgets. Results are written in the parent as they
+    # complete.
+    import multiprocessing
+
+    context = multiprocessing.get_context()
+    rate_limiters = create_shared_rate_limiters(context)
+    writer = BatchWriter(sink, len(tokens), progress)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker,
+                             initargs=(rate_limiters, use_cache, tolerances, window_shards, stream_window,
+                                       sync_store_path, event_store_path, from_store)) as executor:
+        futures = [executor.submit(_compare_in_worker, token) for token in tokens]
+        for future in as_completed(futures):
+            writer.write(future.result())
+
+    return writer.summary()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare Lootex and OpenSea events for many tokens")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--tokens', help="CSV or JSONL file with chain, contract_address, token_id[, start_time, end_time]")
+    source.add_argument('--contract', help="Compare every token of this contract (requires --chain)")
+    parser.add_argument('--chain', help="Chain ID or name for --contract (e.g., 137, matic)")
+    parser.add_argument('--start-time', help="YYYY-MM-DD HH:MM:SS, applied to --contract tokens")
+    parser.add_argument('--end-time', help="YYYY-MM-DD HH:MM:SS, applied to --contract tokens")
+    parser.add_argument('--output', default='batch_results.jsonl',
+                        help="One row per unmatched event, field difference or failed token (.jsonl or .csv)")
+    parser.add_argument('--summary', help="Write counts per event type and token to this JSON file")
+    parser.add_argument('--metrics', action='store_true',
+                        help="Print request, page and stage timings (fetch/normalize/compare) at the end")
+    parser.add_argument('--metrics-json', help="Write the timings to this JSON file")
+    parser.add_argument('--workers', type=int, default=8, help="Tokens compared in parallel")
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Compare tokens in this many worker processes sharing the rate limits, instead of threads")
+    parser.add_argument('--progress', action='store_true',
+                        help="Print tokens done, events/sec and an ETA to stderr while running")
+    parser.add_argument('--checkpoint',
+                        help="Record finished tokens in this JSONL file; rerun with it to resume without refetching them")
+    parser.add_argument('--price-decimals', type=int, default=6, help="Decimals prices are rounded to before comparing")
+    parser.add_argument('--timestamp-skew', type=float, default=0, help="Seconds two event times may differ by")
+    parser.add_argument('--timestamp-offset', type=float, default=0, help="Seconds added to OpenSea times before comparing")
+    parser.add_argument('--no-cache', action='store_true', help="Bypass the on-disk response cache")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only fetch events newer than each token's last sync and merge them into the sync store")
+    parser.add_argument('--sync-store', help="Sync store path for --incremental (default: SYNC_STORE_PATH)")
+    parser.add_argument('--window-shards', type=int, default=None,
+                        help="Split each bounded time range into this many windows fetched concurrently")
+    parser.add_argument('--event-store', nargs='?', const='', default=None,
+                        help="Save normalized events to this indexed store (default path: EVENT_STORE_PATH)")
+    parser.add_argument('--from-store', action='store_true',
+                        help="Compare the events already in --event-store instead of fetching")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Merge-join each token's histories as pages arrive, holding only --stream-window of events")
+    parser.add_argument('--stream-window', type=float, default=STREAM_WINDOW_SECONDS,
+                        help="Seconds an unmatched event waits for its counterpart with --streaming")
+    parser.add_argument('--bulk', action='store_true',
+                        help="Fetch each contract's history once and compare its tokens locally")
+    parser.add_argument('--use-async', action='store_true', help="Drive all fetches from one asyncio event loop")
+    parser.add_argument('--max-concurrency', type=int, default=ASYNC_MAX_CONCURRENCY,
+                        help="Requests in flight across both marketplaces with --use-async")
+    args = parser.parse_args(argv)
+    if args.contract and not args.chain:
+        parser.error("--contract requires --chain")
+    if args.bulk and (args.incremental or args.use_async):
+        parser.error("--bulk cannot be combined with --incremental or --use-async")
+    if args.incremental and args.use_async:
+        parser.error("--incremental cannot be combined with --use-async")
+    if args.event_store is not None and args.use_async:
+        parser.error("--event-store cannot be combined with --use-async")
+    if args.streaming and (args.bulk or args.incremental or args.use_async or args.event_store is not None
+                           or args.window_shards is not None):
+        parser.error("--streaming cannot be combined with --bulk, --incremental, --use-async, --event-store "
+                     "or --window-shards")
+    if args.from_store:
+        if args.event_store is None:
+            parser.error("--from-store requires --event-store")
+        if args.incremental or args.bulk:
+            parser.error("--from-store cannot be combined with --incremental or --bulk")
+    if args.processes is not None and (args.bulk or args.use_async or args.metrics or args.metrics_json):
+        parser.error("--processes cannot be combined with --bulk, --use-async or --metrics")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.tokens:
+        tokens = load_tokens(args.tokens)
+    else:
+        with OpenSeaClient() as opensea_client:
+            tokens = list_contract_tokens(args.chain, args.contract, opensea_client, args.start_time, args.end_time)
+
+    tolerances = Tolerances(args.price_decimals, args.timestamp_offset, args.timestamp_skew)
+    report = SummaryReport(args.summary)
+    metrics = Metrics() if args.metrics or args.metrics_json else None
+    stream_window = args.stream_window if args.streaming else None
+
+    sinks = [open_sink(args.output), report]
+    if args.checkpoint:
+        # Tokens an earlier run finished go straight to the outputs.
+        done = load_checkpoint(args.checkpoint)
+        finished = [done[checkpoint_key(token)] for token in tokens if checkpoint_key(token) in done]
+        for token_result in finished:
+            for output in sinks:
+                output.write_token(token_result)
+        tokens = [token for token in tokens if checkpoint_key(token) not in done]
+        if finished:
+            print(f"Resuming from {args.checkpoint}: {len(finished)} tokens already compared, {len(tokens)} left")
+        sinks.append(CheckpointSink(args.checkpoint))
+
+    with MultiSink(sinks) as sink:
+        if args.use_async:
+            asyncio.run(run_batch_async(tokens, sink, max_concurrency=args.max_concurrency, tolerances=tolerances,
+                                        metrics=metrics, progress=args.progress))
+        elif args.processes is not None:
+            run_batch_processes(tokens, sink, args.processes, use_cache=not args.no_cache, tolerances=tolerances,
+                                window_shards=args.window_shards, stream_window=stream_window,
+                                sync_store_path=(args.sync_store or '') if args.incremental else None,
+                                event_store_path=args.event_store, from_store=args.from_store,
+                                progress=args.progress)
+        else:
+            sync_store = SyncStore(args.sync_store) if args.incremental else None
+            event_store = EventStore(args.event_store) if args.event_store is not None else None
+            try:
+                run_batch(tokens, sink, max_workers=args.workers, use_cache=not args.no_cache, sync_store=sync_store,
+                          tolerances=tolerances, metrics=metrics, bulk=args.bulk, window_shards=args.window_shards,
+                          event_store=event_store, from_store=args.from_store, stream_window=stream_window,
+                          progress=args.progress)
+            finally:
+                if sync_store is not None:
+                    sync_store.close()
+                if event_store is not None:
+                    event_store.close()
+
+    report.print()
+    if args.metrics:
+        print()
+        print(metrics.format_table())
+    if args.metrics_json:
+        metrics.to_json(args.metrics_json)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+import sys
+import os
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.lootex_client import LootexClient
+from src.opensea_client import OpenSeaClient
+from src.normalize import normalize_lootex_events, normalize_opensea_events
+from src.rate_limit import HOST_RATE_LIMITS, reset_rate_limiters
+from src.reconcile import STREAM_WINDOW_SECONDS
+from src.result_sink import SummaryReport
+from src.compare import EVENT_TYPES, compare_batches
+from tests.mock_server import MockMarketplace, synthetic_events
+from tests.test_lootex import partition_lootex_events
+from tests.test_opensea import OPENSEA_QUERY_EVENT_TYPES, partition_opensea_events
+from tests.test_comparator import compare_events
+from tests.batch_comparator import run_batch
+
+CONTRACT = '0x00000000000000000000000000000000000000bb'
+
+# Milliseconds src/cli.py may add to a bare interpreter start before it
+# begins fetching (measured with --from-store, which imports everything the
+# comparison needs except the HTTP stack).
+CLI_STARTUP_BUDGET_MS = 100
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def latency_summary(seconds):
+    return {
+        'pages': len(seconds),
+        'p50_ms': round(percentile(seconds, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(seconds, 0.95) * 1000, 3),
+        'max_ms': round(max(seconds, default=0.0) * 1000, 3),
+    }
+
+def bench_lootex_crawl(mock, args):
+    with LootexClient(cache=False, max_workers=args.lootex_workers) as client:
+        client.base_url = mock.lootex_url
+        started = time.perf_counter()
+        events = 0
+        for token_id in range(1, args.tokens + 1):
+            events += len(client.crawl_nft_events('137', CONTRACT, str(token_id))[0])
+        elapsed = time.perf_counter() - started
+    return {'tokens': args.tokens, 'events': events, 'elapsed': elapsed, 'events_per_sec': events / elapsed}
+
+def bench_lootex_page_latency(mock, args):
+    with LootexClient(cache=False) as client:
+        client.base_url = mock.lootex_url
+        endpoint = f"{client.base_url}/orders/history"
+        params = {'limit': 30, 'chainId': '137', 'contractAddress': CONTRACT, 'tokenId': '1', 'platformType': 1}
+        timings = []
+        started = time.perf_counter()
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            page_started = time.perf_counter()
+            _, total_pages = client._fetch_page(endpoint, params, page)
+            timings.append(time.perf_counter() - page_started)
+            page += 1
+        elapsed = time.perf_counter() - started
+    return {**latency_summary(timings), 'elapsed': elapsed}
+
+def bench_opensea_crawl(mock, args):
+    with OpenSeaClient(cache=False) as client:
+        client.base_url = mock.opensea_url
+        started = time.perf_counter()
+        events = 0
+        for token_id in range(1, args.tokens + 1):
+            events += len(client.crawl_nft_events('matic', CONTRACT, str(token_id), OPENSEA_QUERY_EVENT_TYPES)[0])
+        elapsed = time.perf_counter() - started
+    return {'tokens': args.tokens, 'events': events, 'elapsed': elapsed, 'events_per_sec': events / elapsed}
+
+def bench_opensea_page_latency(mock, args):
+    with OpenSeaClient(cache=False) as client:
+        client.base_url = mock.opensea_url
+        timings = []
+        started = time.perf_counter()
+        cursor = None
+        while True:
+            page_started = time.perf_counter()
+            data = client.get_nft_events('matic', CONTRACT, '1', OPENSEA_QUERY_EVENT_TYPES, next=cursor)
+            timings.append(time.perf_counter() - page_started)
+            cursor = data.get('next')
+            if not cursor:
+                break
+        elapsed = time.perf_counter() - started
+    return {**latency_summary(timings), 'elapsed': elapsed}
+
+def bench_compare_events(mock, args):
+    # Comparison alone, on one in-memory history of --compare-events events
+    # per side: the dict-based compare_events on formatted events and
+    # compare_batches on normalized ones.
+    lootex, opensea = synthetic_events(CONTRACT, 1, args.compare_events, args.mismatch_rate, args.seed)
+    lootex_raw = [event for _, event in lootex]
+    opensea_raw = [event for _, event in opensea]
+    events = len(lootex_raw) + len(opensea_raw)
+
+    started = time.perf_counter()
+    lootex_by_type = partition_lootex_events(lootex_raw)
+    opensea_by_type = partition_opensea_events(opensea_raw)
+    for event_type in EVENT_TYPES:
+        compare_events(lootex_by_type[event_type], opensea_by_type[event_type], event_type, verbose=False)
+    dict_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    lootex_batch = normalize_lootex_events(lootex_raw)
+    opensea_batch = normalize_opensea_events(opensea_raw)
+    for event_type in EVENT_TYPES:
+        compare_batches(lootex_batch, opensea_batch, event_type, verbose=False)
+    batch_elapsed = time.perf_counter() - started
+
+    return {
+        'events': events,
+        'elapsed': dict_elapsed + batch_elapsed,
+        'compare_events_per_sec': events / dict_elapsed,
+        'compare_batches_per_sec': events / batch_elapsed,
+    }
+
+def bench_compare_token(mock, args, stream_window=None):
+    # End to end: both marketplaces fetched, normalized and compared for
+    # every token, through the batch runner.
+    with LootexClient(cache=False, max_workers=args.lootex_workers) as lootex_client, \
+            OpenSeaClient(cache=False) as opensea_client:
+        lootex_client.base_url = mock.lootex_url
+        opensea_client.base_url = mock.opensea_url
+        tokens = [
+            {'chain': '137', 'contract_address': CONTRACT, 'token_id': str(token_id), 'start_time': None, 'end_time': None}
+            for token_id in range(1, args.tokens + 1)
+        ]
+        report = SummaryReport()
+        started = time.perf_counter()
+        run_batch(tokens, report, max_workers=args.workers, lootex_client=lootex_client, opensea_client=opensea_client,
+                  stream_window=stream_window)
+        elapsed = time.perf_counter() - started
+
+    events = sum(counts['matching'] + counts['lootex_only'] + counts['opensea_only']
+                 for counts in report.by_event_type.values())
+    return {'tokens': args.tokens, 'errors': report.errors, 'elapsed': elapsed,
+            'tokens_per_sec': args.tokens / elapsed, 'compared_events_per_sec': events / elapsed}
+
+def bench_compare_token_streaming(mock, args):
+    # compare_token with the streaming merge-join; compare peak_memory_mb
+    # against compare_token.
+    return bench_compare_token(mock, args, stream_window=STREAM_WINDOW_SECONDS)
+
+def _run_cli(args, env=None, runs=3):
+    # Fastest of a few runs, since process start-up is noisy.
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       env=env, capture_output=True, check=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def bench_cli_startup(mock, args):
+    # Wall time of fresh `python -m src.cli` processes, as a cron loop or
+    # shell script would run them: --help, a --from-store run against an
+    # empty store, and one token compared against the mock.
+    env = dict(os.environ, LOOTEX_API_URL=mock.lootex_url, OPENSEA_API_URL=mock.opensea_url,
+               LOOTEX_RATE_LIMIT=str(args.rate_limit), OPENSEA_RATE_LIMIT=str(args.rate_limit))
+    token = ['-m', 'src.cli', '--chain', '137', '--contract', CONTRACT, '--token', '1', '--quiet']
+    with tempfile.TemporaryDirectory() as directory:
+        store = os.path.join(directory, 'events.db')
+        timings = {
+            'interpreter': _run_cli(['-c', 'pass']),
+            'help': _run_cli(['-m', 'src.cli', '--help']),
+            'from_store': _run_cli([*token, '--event-store', store, '--from-store']),
+            'token': _run_cli([*token, '--no-cache'], env),
+        }
+    overhead_ms = (timings['from_store'] - timings['interpreter']) * 1000
+    return {
+        **{f"{name}_ms": seconds * 1000 for name, seconds in timings.items()},
+        'startup_overhead_ms': overhead_ms,
+        'budget_ms': CLI_STARTUP_BUDGET_MS,
+        'within_budget': overhead_ms <= CLI_STARTUP_BUDGET_MS,
+        'elapsed': sum(timings.values()),
+    }
+
+BENCHMARKS = {
+    'lootex_crawl': bench_lootex_crawl,
+    'lootex_page_latency': bench_lootex_page_latency,
+    'opensea_crawl': bench_opensea_crawl,
+    'opensea_page_latency': bench_opensea_page_latency,
+    'compare_events': bench_compare_events,
+    'compare_token': bench_compare_token,
+    'compare_token_streaming': bench_compare_token_streaming,
+    'cli_startup': bench_cli_startup,
+}
+
+def run_benchmark(benchmark, mock, args):
+    # The reported run is the median by wall time. Peak memory comes from an
+    # extra run under tracemalloc, which is too slow to time.
+    runs = []
+    for _ in range(args.repeat):
+        reset_rate_limiters()
+        runs.append(benchmark(mock, args))
+    result = sorted(runs, key=lambda run: run['elapsed'])[len(runs) // 2]
+
+    if not args.no_memory:
+        reset_rate_limiters()
+        tracemalloc.start()
+        try:
+            benchmark(mock, args)
+            result['peak_memory_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+
+    return {name: round(value, 3) if isinstance(value, float) else value for name, value in result.items()}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results, baseline=None):
+    baseline_results = (baseline or {}).get('benchmarks', {})
+    for name, metrics in results.items():
+        print(f"\n{name}")
+        previous = baseline_results.get(name, {})
+        for metric, value in metrics.items():
+            line = f"  {metric:<26} {value:>14}"
+            old = previous.get(metric)
+            if isinstance(old, (int, float)) and isinstance(value, (int, float)) and not isinstance(value, bool) and old:
+                line += f"  ({(value - old) / old * 100:+.1f}% vs {old})"
+            print(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against the local mock marketplace")
+    parser.add_argument('benchmarks', nargs='*', help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('--tokens', type=int, default=10, help="Tokens crawled or compared per run")
+    parser.add_argument('--events-per-token', type=int, default=300, help="Synthetic history length per token")
+    parser.add_argument('--compare-events', type=int, default=100000, help="History length for compare_events")
+    parser.add_argument('--latency', type=float, default=0.02, help="Seconds the mock adds to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument('--mismatch-rate', type=float, default=0.01, help="Fraction of events missing on one side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate-limit', type=float, default=1000, help="Client-side requests/sec allowed to the mock")
+    parser.add_argument('--workers', type=int, default=8, help="Tokens compared in parallel in compare_token")
+    parser.add_argument('--lootex-workers', type=int, default=None, help="Lootex page workers (default: LOOTEX_MAX_WORKERS)")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per benchmark; the median is reported")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak memory run")
+    parser.add_argument('--output-dir', default='benchmark_results', help="Directory results are saved to")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.benchmarks or list(BENCHMARKS)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    mock = MockMarketplace(args.events_per_token, args.tokens, args.latency, args.error_rate, args.throttle_rate,
+                           mismatch_rate=args.mismatch_rate, seed=args.seed)
+    # The configured limits are for the real APIs; the mock is only bounded
+    # by --rate-limit.
+    HOST_RATE_LIMITS['127.0.0.1'] = args.rate_limit
+
+    results = {}
+    with mock:
+        for name in names:
+            print(f"Running {name}...")
+            results[name] = run_benchmark(BENCHMARKS[name], mock, args)
+
+    print_results(results, baseline)
+
+    started_at = datetime.now(timezone.utc)
+    report = {
+        'started_at': started_at.isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {name: value for name, value in vars(args).items() if name not in ('output_dir', 'baseline')},
+        'server_statuses': {str(status): count for status, count in mock.status_counts.items()},
+        'benchmarks': results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"bench-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json")
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+if __name__ == "__main__":
+    main()
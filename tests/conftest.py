@@ -0,0 +1,32 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.lootex_client
+import src.opensea_client
+from src.rate_limit import HOST_RATE_LIMITS, reset_rate_limiters
+from tests.mock_server import MockMarketplace
+
+# Contract the mock_marketplace fixture serves MOCK_TOKENS tokens for.
+MOCK_CONTRACT = '0x00000000000000000000000000000000000000bb'
+MOCK_TOKENS = 4
+
+@pytest.fixture
+def mock_marketplace(monkeypatch):
+    # A MockMarketplace with a few mismatched events per token that every
+    # client created during the test talks to, without the real APIs' rate
+    # limits. The environment is set too, so worker processes started
+    # without fork are pointed at it as well.
+    with MockMarketplace(events_per_token=150, tokens_per_contract=MOCK_TOKENS, mismatch_rate=0.1, seed=7) as mock:
+        monkeypatch.setattr(src.lootex_client, 'LOOTEX_API_URL', mock.lootex_url)
+        monkeypatch.setattr(src.opensea_client, 'OPENSEA_API_URL', mock.opensea_url)
+        monkeypatch.setitem(HOST_RATE_LIMITS, '127.0.0.1', 10000)
+        monkeypatch.setenv('LOOTEX_API_URL', mock.lootex_url)
+        monkeypatch.setenv('OPENSEA_API_URL', mock.opensea_url)
+        monkeypatch.setenv('DEFAULT_RATE_LIMIT', '10000')
+        reset_rate_limiters()
+        yield mock
+        reset_rate_limiters()
@@ -0,0 +1,322 @@
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.normalize import parse_iso_timestamp
+
+# OpenSea query values -> event_type of the returned events
+OPENSEA_QUERY_TYPES = {'listing': 'order', 'cancel': 'cancel', 'transfer': 'transfer', 'sale': 'transfer'}
+
+SYNTHETIC_START = 1704067200  # 2024-01-01T00:00:00Z
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+def synthetic_events(contract_address, token_id, count, mismatch_rate=0.0, seed=0):
+    # Deterministic history for one token as (timestamp, lootex_event) and
+    # (timestamp, opensea_event) lists, newest first. Every event exists on
+    # both marketplaces except for a `mismatch_rate` fraction that is dropped
+    # from one side.
+    rng = random.Random(f"{seed}:{contract_address}:{token_id}")
+    nft = {'collection': 'mock-collection', 'contract': contract_address, 'identifier': str(token_id)}
+    lootex, opensea = [], []
+    timestamp = SYNTHETIC_START
+
+    for _ in range(count):
+        timestamp += rng.randint(1, 3600)
+        category = rng.choice(('list', 'list', 'cancel', 'sale'))
+        maker = f"0x{rng.getrandbits(160):040x}"
+        order_hash = f"0x{rng.getrandbits(256):064x}"
+        price_wei = rng.randint(1, 10 ** 6) * 10 ** 12
+
+        if category == 'list':
+            expiration = timestamp + 7 * 86400
+            lootex_event = {'category': 'list', 'hash': order_hash, 'startTime': iso_time(timestamp),
+                            'endTime': iso_time(expiration), 'price': f"{price_wei / 10 ** 18:.6f}",
+                            'currencySymbol': 'ETH', 'amount': '1', 'fromAddress': maker,
+                            'contractAddress': contract_address, 'tokenId': str(token_id),
+                            'collectionName': 'Mock Collection'}
+            opensea_event = {'event_type': 'order', 'order_type': 'listing', 'order_hash': order_hash,
+                             'event_timestamp': timestamp, 'start_date': timestamp, 'expiration_date': expiration,
+                             'maker': maker, 'quantity': 1,
+                             'payment': {'quantity': str(price_wei), 'decimals': 18, 'symbol': 'ETH'},
+                             'asset': nft}
+        elif category == 'cancel':
+            lootex_event = {'category': 'cancel', 'hash': order_hash, 'startTime': iso_time(timestamp),
+                            'fromAddress': maker, 'contractAddress': contract_address, 'tokenId': str(token_id),
+                            'collectionName': 'Mock Collection'}
+            opensea_event = {'event_type': 'cancel', 'order_type': 'listing', 'order_hash': order_hash,
+                             'event_timestamp': timestamp, 'nft': nft}
+        else:
+            txhash = f"0x{rng.getrandbits(256):064x}"
+            buyer = f"0x{rng.getrandbits(160):040x}"
+            lootex_event = {'category': 'sale', 'hash': order_hash, 'txHash': txhash, 'startTime': iso_time(timestamp),
+                            'price': f"{price_wei / 10 ** 18:.6f}", 'currencySymbol': 'ETH', 'amount': '1',
+                            'fromAddress': maker, 'toAddress': buyer, 'contractAddress': contract_address,
+                            'tokenId': str(token_id), 'collectionName': 'Mock Collection'}
+            opensea_event = {'event_type': 'transfer', 'transaction': txhash, 'event_timestamp': timestamp,
+                             'from_address': maker, 'to_address': buyer, 'quantity': 1, 'nft': nft}
+
+        roll = rng.random()
+        if roll >= mismatch_rate / 2:
+            lootex.append((timestamp, lootex_event))
+        if roll < mismatch_rate / 2 or roll >= mismatch_rate:
+            opensea.append((timestamp, opensea_event))
+
+    lootex.reverse()
+    opensea.reverse()
+    return lootex, opensea
+
+def load_fixture(path, time_fn):
+    # A recorded response body, or a plain JSON list of raw events.
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('ordersHistory') or data.get('asset_events') or []
+    events = [(time_fn(event), event) for event in data]
+    events.sort(key=lambda item: item[0], reverse=True)
+    return events
+
+class MockHTTPServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 refuses connections when a batch run
+    # opens its whole pool at once.
+    request_queue_size = 256
+    daemon_threads = True
+
+class MockMarketplace:
+    # Local stand-in for the Lootex /orders/history and OpenSea v2 event,
+    # contract and NFT endpoints. Histories are synthetic per token unless recorded events
+    # are given, in which case every token replays them.
+    #
+    # latency: seconds added to every response.
+    # error_rate / throttle_rate: fraction of requests answered with a 500,
+    #     or a 429 carrying `retry_after`.
+    def __init__(self, events_per_token=300, tokens_per_contract=20, latency=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=0.05, mismatch_rate=0.0, seed=0, lootex_events=None, opensea_events=None,
+                 host='127.0.0.1', port=0):
+        self.events_per_token = events_per_token
+        self.tokens_per_contract = tokens_per_contract
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.mismatch_rate = mismatch_rate
+        self.seed = seed
+        self.lootex_events = lootex_events
+        self.opensea_events = opensea_events
+        self.status_counts = Counter()
+        self._histories = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = MockHTTPServer((host, port), self._handler_class())
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def lootex_url(self):
+        return f"{self.url}/lootex"
+
+    @property
+    def opensea_url(self):
+        return f"{self.url}/opensea"
+
+    def serve_forever(self):
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def history(self, contract_address, token_id=None):
+        # token_id=None is the whole contract: every listed token's history
+        # merged newest first.
+        key = (contract_address.lower(), None if token_id is None else str(token_id))
+        with self._lock:
+            history = self._histories.get(key)
+        if history is not None:
+            return history
+
+        if self.lootex_events is not None and self.opensea_events is not None:
+            history = (self.lootex_events, self.opensea_events)
+        elif token_id is None:
+            histories = [self.history(key[0], i) for i in range(1, self.tokens_per_contract + 1)]
+            history = tuple(sorted((item for h in histories for item in h[side]), key=lambda item: item[0], reverse=True)
+                            for side in (0, 1))
+        else:
+            lootex, opensea = synthetic_events(key[0], key[1], self.events_per_token, self.mismatch_rate, self.seed)
+            history = (self.lootex_events or lootex, self.opensea_events or opensea)
+
+        with self._lock:
+            return self._histories.setdefault(key, history)
+
+    def _fault(self):
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 500
+        return None
+
+    def _lootex_history(self, query):
+        limit = int(query.get('limit', ['30'])[0])
+        page = int(query.get('page', ['1'])[0])
+        after = parse_iso_timestamp(query['startTimeGt'][0]) if 'startTimeGt' in query else None
+        before = parse_iso_timestamp(query['startTimeLt'][0]) if 'startTimeLt' in query else None
+
+        token_id = query['tokenId'][0] if 'tokenId' in query else None
+        lootex, _ = self.history(query['contractAddress'][0], token_id)
+        events = [event for timestamp, event in lootex
+                  if (after is None or timestamp > after) and (before is None or timestamp < before)]
+        total_pages = max(1, -(-len(events) // limit))
+        return {'ordersHistory': events[(page - 1) * limit:page * limit],
+                'pagination': {'totalPage': total_pages, 'page': page}}
+
+    def _opensea_events(self, contract_address, token_id, query):
+        # token_id=None serves the contract's collection.
+        limit = int(query.get('limit', ['50'])[0])
+        offset = int(query.get('next', ['0'])[0])
+        after = int(query['after'][0]) if 'after' in query else None
+        before = int(query['before'][0]) if 'before' in query else None
+        types = {OPENSEA_QUERY_TYPES.get(value, value) for value in query.get('event_type', [])}
+
+        _, opensea = self.history(contract_address, token_id)
+        events = [event for timestamp, event in opensea
+                  if (not types or event['event_type'] in types)
+                  and (after is None or timestamp >= after) and (before is None or timestamp <= before)]
+        page = events[offset:offset + limit]
+        next_cursor = str(offset + limit) if offset + limit < len(events) else None
+        return {'asset_events': page, 'next': next_cursor}
+
+    def _contract_nfts(self, contract_address, query):
+        limit = int(query.get('limit', ['200'])[0])
+        offset = int(query.get('next', ['0'])[0])
+        identifiers = range(offset + 1, min(self.tokens_per_contract, offset + limit) + 1)
+        next_cursor = str(offset + limit) if offset + limit < self.tokens_per_contract else None
+        return {'nfts': [{'identifier': str(i), 'contract': contract_address} for i in identifiers],
+                'next': next_cursor}
+
+    def route(self, path, query):
+        # Returns the response body for a GET, or None for an unknown path.
+        parts = path.strip('/').split('/')
+        if parts[:3] == ['lootex', 'orders', 'history']:
+            return self._lootex_history(query)
+        if len(parts) == 8 and parts[:3] == ['opensea', 'events', 'chain'] and parts[4] == 'contract' and parts[6] == 'nfts':
+            return self._opensea_events(parts[5], parts[7], query)
+        if len(parts) == 4 and parts[:3] == ['opensea', 'events', 'collection'] and parts[3].startswith('mock-'):
+            return self._opensea_events(parts[3][len('mock-'):], None, query)
+        if len(parts) == 5 and parts[:2] == ['opensea', 'chain'] and parts[3] == 'contract':
+            return {'address': parts[4], 'chain': parts[2], 'collection': f"mock-{parts[4].lower()}"}
+        if len(parts) == 6 and parts[:2] == ['opensea', 'chain'] and parts[3] == 'contract' and parts[5] == 'nfts':
+            return self._contract_nfts(parts[4], query)
+        return None
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like the real APIs, so connection pooling shows up
+            # in the numbers.
+            protocol_version = 'HTTP/1.1'
+            # Headers and body are written separately; without this, Nagle
+            # plus delayed ACKs add ~40ms to every keep-alive response.
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=()):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                with mock._lock:
+                    mock.status_counts[status] += 1
+
+            def do_GET(self):
+                if mock.latency:
+                    time.sleep(mock.latency)
+
+                fault = mock._fault()
+                if fault == 429:
+                    self._send(429, {'detail': 'Request was throttled.'}, [('Retry-After', str(mock.retry_after))])
+                    return
+                if fault == 500:
+                    self._send(500, {'detail': 'Injected server error.'})
+                    return
+
+                parsed = urlparse(self.path)
+                body = mock.route(parsed.path, parse_qs(parsed.query))
+                if body is None:
+                    self._send(404, {'detail': 'Not found.'})
+                else:
+                    self._send(200, body)
+
+        return Handler
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve synthetic or recorded Lootex/OpenSea responses locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--events-per-token', type=int, default=300, help="Synthetic history length per token")
+    parser.add_argument('--tokens-per-contract', type=int, default=20, help="Tokens listed for a contract")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with a 500")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered with a 429")
+    parser.add_argument('--retry-after', type=float, default=0.05, help="Retry-After seconds sent with a 429")
+    parser.add_argument('--mismatch-rate', type=float, default=0.0, help="Fraction of events missing on one side")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--lootex-fixture', help="Recorded /orders/history body or event list replayed for every token")
+    parser.add_argument('--opensea-fixture', help="Recorded events body or event list replayed for every token")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    lootex_events = opensea_events = None
+    if args.lootex_fixture:
+        lootex_events = load_fixture(args.lootex_fixture, lambda event: parse_iso_timestamp(event.get('startTime')))
+    if args.opensea_fixture:
+        opensea_events = load_fixture(args.opensea_fixture, lambda event: int(event.get('event_timestamp') or 0))
+
+    mock = MockMarketplace(args.events_per_token, args.tokens_per_contract, args.latency, args.error_rate,
+                           args.throttle_rate, args.retry_after, args.mismatch_rate, args.seed,
+                           lootex_events, opensea_events, args.host, args.port)
+    print(f"LOOTEX_API_URL={mock.lootex_url}")
+    print(f"OPENSEA_API_URL={mock.opensea_url}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import sys
+import os
+import json
+import multiprocessing
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.result_sink import CheckpointSink, SummaryReport, checkpoint_key, load_checkpoint
+from tests.batch_comparator import main, run_batch, run_batch_processes
+from tests.conftest import MOCK_CONTRACT, MOCK_TOKENS
+
+TOKENS = [
+    {'chain': '137', 'contract_address': MOCK_CONTRACT, 'token_id': str(token_id), 'start_time': None, 'end_time': None}
+    for token_id in range(1, MOCK_TOKENS + 1)
+]
+
+def ok_result(token_id):
+    return {'chain': '137', 'contract_address': MOCK_CONTRACT, 'token_id': token_id, 'start_time': None,
+            'end_time': None, 'status': 'ok', 'results': []}
+
+def test_checkpoint_key_ignores_token_id_types():
+    assert checkpoint_key({**TOKENS[0], 'token_id': 1}) == checkpoint_key(TOKENS[0])
+
+def test_load_checkpoint(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    assert load_checkpoint(path) == {}
+
+    with CheckpointSink(path) as sink:
+        sink.write_token(ok_result('1'))
+        sink.write_token({**ok_result('2'), 'status': 'error', 'error': 'boom'})
+    # A run interrupted mid-write leaves a partial last line.
+    with open(path, 'a') as f:
+        f.write('{"chain": "137", "token')
+    with CheckpointSink(path) as sink:
+        sink.write_token(ok_result('3'))
+
+    done = load_checkpoint(path)
+    assert sorted(result['token_id'] for result in done.values()) == ['1', '3']
+    assert checkpoint_key(TOKENS[0]) in done
+
+def summarize(run, *args, **kwargs):
+    report = SummaryReport()
+    run(TOKENS, report, *args, use_cache=False, **kwargs)
+    assert report.errors == 0
+    return report.to_dict()
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_process_mode_matches_thread_mode(mock_marketplace):
+    threads = summarize(run_batch, max_workers=4)
+    processes = summarize(run_batch_processes, 2)
+
+    assert processes == threads
+    assert any(counts['lootex_only'] for counts in threads['by_event_type'].values())
+
+def run_main(tmp_path, name, checkpoint):
+    summary = str(tmp_path / f"{name}.json")
+    main(['--tokens', str(tmp_path / 'tokens.jsonl'), '--output', str(tmp_path / f"{name}.jsonl"),
+          '--summary', summary, '--no-cache', '--workers', '2', '--checkpoint', checkpoint])
+    with open(summary) as f:
+        return json.load(f)
+
+def test_checkpoint_resume_matches_a_full_run(mock_marketplace, tmp_path):
+    with open(tmp_path / 'tokens.jsonl', 'w') as f:
+        for token in TOKENS:
+            f.write(json.dumps(token) + '\n')
+
+    full_checkpoint = str(tmp_path / 'full-checkpoint.jsonl')
+    full = run_main(tmp_path, 'full', full_checkpoint)
+    full_requests = sum(mock_marketplace.status_counts.values())
+
+    # Keep the first two finished tokens, as if the run had been killed.
+    resumed_checkpoint = str(tmp_path / 'resumed-checkpoint.jsonl')
+    with open(full_checkpoint) as f:
+        lines = f.readlines()
+    with open(resumed_checkpoint, 'w') as f:
+        f.writelines(lines[:2])
+        f.write(lines[2][:10])
+
+    mock_marketplace.status_counts.clear()
+    resumed = run_main(tmp_path, 'resumed', resumed_checkpoint)
+
+    assert resumed['by_token'] == full['by_token']
+    assert resumed['by_event_type'] == full['by_event_type']
+    assert 0 < sum(mock_marketplace.status_counts.values()) < full_requests
+    assert len(load_checkpoint(resumed_checkpoint)) == MOCK_TOKENS
@@ -0,0 +1,41 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cli import main
+from src.event_store import EventStore
+from src.normalize import EVENT_TYPE_CODES, EventBatch
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+
+def build_store(path, opensea_only_type):
+    # One listing on both sides plus one event only OpenSea reports.
+    lootex, opensea = EventBatch('lootex'), EventBatch('opensea')
+    for batch in (lootex, opensea):
+        batch.append(EVENT_TYPE_CODES['listing'], '0xlisting', 1704067200, 1704672000, 10, 0, 'ETH', 1, '0xmaker')
+    opensea.append(EVENT_TYPE_CODES[opensea_only_type], '0xextra', 1704070800, quantity=1,
+                   from_address='0xmaker', to_address='0xbuyer')
+    with EventStore(path) as store:
+        store.insert_batch(lootex, '137', CONTRACT, '1')
+        store.insert_batch(opensea, '137', CONTRACT, '1')
+
+def run_check(path):
+    return main(['--chain', '137', '--contract', CONTRACT, '--token', '1', '--event-store', path,
+                 '--from-store', '--quiet', '--check'])
+
+def test_check_ignores_opensea_only_sales(tmp_path):
+    path = str(tmp_path / 'events.db')
+    build_store(path, 'sale')
+    assert run_check(path) == 0
+
+def test_check_fails_on_opensea_only_listing(tmp_path):
+    path = str(tmp_path / 'events.db')
+    build_store(path, 'listing')
+    assert run_check(path) == 1
+
+def test_from_store_requires_event_store():
+    with pytest.raises(SystemExit):
+        main(['--chain', '137', '--contract', CONTRACT, '--token', '1', '--from-store'])
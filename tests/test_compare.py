@@ -0,0 +1,78 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.cli import parse_args as parse_cli_args
+from src.compare import compare_token, compare_token_streaming, get_chain_info, parse_opensea_time
+from src.lootex_client import LootexClient
+from src.opensea_client import OpenSeaClient
+from tests.batch_comparator import parse_args as parse_batch_args
+from tests.conftest import MOCK_CONTRACT
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+NFT = {'collection': 'mock', 'contract': CONTRACT, 'identifier': '1'}
+
+LOOTEX_EVENTS = [
+    {'category': 'cancel', 'hash': '0xcancel-lootex', 'startTime': '2024-01-01T03:00:00.000Z'},
+]
+OPENSEA_EVENTS = [
+    {'event_type': 'transfer', 'transaction': '0xtransfer', 'event_timestamp': 1704074400,
+     'from_address': '0xa', 'to_address': '0xb', 'quantity': 1, 'nft': NFT},
+    {'event_type': 'cancel', 'order_type': 'listing', 'order_hash': '0xcancel-opensea',
+     'event_timestamp': 1704070800, 'nft': NFT},
+]
+
+class FakeLootexClient:
+    def get_nft_events(self, chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
+        return list(LOOTEX_EVENTS)
+
+    def iter_nft_events(self, chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
+        return iter(LOOTEX_EVENTS)
+
+class FakeOpenSeaClient:
+    def iter_nft_events(self, chain, contract_address, token_id, event_types=None, after=None, before=None):
+        return iter(OPENSEA_EVENTS)
+
+def compare(compare_fn, **kwargs):
+    return compare_fn('137', CONTRACT, '1', lootex_client=FakeLootexClient(), opensea_client=FakeOpenSeaClient(),
+                      **kwargs)
+
+def test_get_chain_info():
+    assert get_chain_info('matic') == ('137', 'matic')
+    assert get_chain_info(8453) == ('8453', 'base')
+    assert get_chain_info('10') == ('10', '10')
+
+def test_parse_opensea_time_is_utc():
+    assert parse_opensea_time('2024-01-01 00:00:00') == 1704067200
+    assert parse_opensea_time('') is None
+
+def test_streaming_matches_batch_results():
+    assert compare(compare_token_streaming, verbose=False) == compare(compare_token, verbose=False)
+
+def test_streaming_verbose_does_not_list_opensea_only_sales(capsys):
+    results = compare(compare_token_streaming)
+    output = capsys.readouterr().out
+
+    assert {result['event_type']: result['opensea_only'] for result in results}['sale'] == ['0xtransfer']
+    assert '0xtransfer' not in output
+    assert '0xcancel-opensea' in output and '0xcancel-lootex' in output
+
+def test_streaming_matches_batch_on_the_mock(mock_marketplace):
+    with LootexClient(cache=False) as lootex_client, OpenSeaClient(cache=False) as opensea_client:
+        for token_id in ('1', '2'):
+            clients = {'lootex_client': lootex_client, 'opensea_client': opensea_client, 'verbose': False}
+            batch = compare_token('137', MOCK_CONTRACT, token_id, **clients)
+            streamed = compare_token_streaming('137', MOCK_CONTRACT, token_id, **clients)
+
+            assert streamed == batch
+            assert any(result['lootex_only'] or result['opensea_only'] for result in batch)
+
+def test_streaming_rejects_window_shards():
+    # Window shards are crawled whole, which a streamed comparison avoids.
+    with pytest.raises(SystemExit):
+        parse_cli_args(['--chain', '137', '--contract', CONTRACT, '--token', '1', '--streaming', '--window-shards', '4'])
+    with pytest.raises(SystemExit):
+        parse_batch_args(['--tokens', 'tokens.csv', '--streaming', '--window-shards', '4'])
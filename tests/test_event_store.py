@@ -0,0 +1,50 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_store import EventStore
+from src.normalize import EVENT_TYPE_CODES, MISSING_TIME, EventBatch
+
+CONTRACT = '0xAbC0000000000000000000000000000000000001'
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / 'events.db'))
+    batch = EventBatch('lootex')
+    for txhash, timestamp in (('0x1', 100), ('0x2', 200), ('0x3', 300), ('0x4', MISSING_TIME)):
+        batch.append(EVENT_TYPE_CODES['listing'], txhash, timestamp, price_raw=10 ** 30, price_decimals=18,
+                     from_address='0xMAKER')
+    store.insert_batch(batch, 137, CONTRACT, '1')
+    yield store
+    store.close()
+
+def hashes(batch):
+    return list(batch.txhash)
+
+def test_load_batch_is_newest_first(store):
+    assert hashes(store.load_batch('lootex', 137, CONTRACT.lower(), 1)) == ['0x3', '0x2', '0x1', '0x4']
+
+def test_load_batch_bounds_are_exclusive_and_skip_undated_rows(store):
+    assert hashes(store.load_batch('lootex', 137, CONTRACT, '1', 100, 300)) == ['0x2']
+    assert hashes(store.load_batch('lootex', 137, CONTRACT, '1', start=100)) == ['0x3', '0x2']
+    assert hashes(store.load_batch('lootex', 137, CONTRACT, '1', end=300)) == ['0x2', '0x1']
+
+def test_load_batch_filters_source_and_event_type(store):
+    assert len(store.load_batch('opensea', 137, CONTRACT, '1')) == 0
+    assert len(store.load_batch('lootex', 137, CONTRACT, '1', event_type='sale')) == 0
+
+def test_large_prices_and_addresses_round_trip(store):
+    batch = store.load_batch('lootex', 137, CONTRACT, '1')
+    assert batch.price_raw[0] == 10 ** 30
+    assert batch.from_address[0] == '0xmaker'
+    assert store.find_by_hash('0x2')[0]['event_type'] == 'listing'
+
+def test_reinserted_events_replace_stored_rows(store):
+    batch = EventBatch('lootex')
+    batch.append(EVENT_TYPE_CODES['listing'], '0x1', 150)
+    store.insert_batch(batch, 137, CONTRACT, '1')
+    assert store.count(source='lootex', chain=137, contract_address=CONTRACT, token_id='1') == 4
+    assert hashes(store.load_batch('lootex', 137, CONTRACT, '1', 100, 200)) == ['0x1']
@@ -0,0 +1,70 @@
+import sys
+import os
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.incremental_sync import SyncStore, sync_lootex_events
+from src.lootex_client import history_event_key, history_event_timestamp
+from tests.batch_comparator import parse_args
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+
+HISTORY = [
+    {'category': 'list', 'hash': '0xa', 'startTime': '2024-01-03T00:00:00.000Z'},
+    {'category': 'list', 'hash': '0xb', 'startTime': '2024-01-02T00:00:00.000Z'},
+    {'category': 'cancel', 'hash': '0xc'},
+    {'category': 'list', 'hash': '0xd', 'startTime': '2024-01-01T00:00:00.000Z'},
+]
+
+class FakeLootexClient:
+    def __init__(self, events):
+        self.events = events
+        self.calls = []
+
+    def crawl_nft_events(self, chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
+        self.calls.append(start_time)
+        return list(self.events), True
+
+@pytest.fixture
+def store(tmp_path):
+    store = SyncStore(str(tmp_path / 'sync.db'))
+    yield store
+    store.close()
+
+def hashes(events):
+    return [event['hash'] for event in events]
+
+def test_unbounded_sync_keeps_undated_events(store):
+    events = sync_lootex_events(FakeLootexClient(HISTORY), store, 137, CONTRACT, '1')
+    assert sorted(hashes(events)) == ['0xa', '0xb', '0xc', '0xd']
+
+def test_bounded_sync_excludes_both_bounds(store):
+    events = sync_lootex_events(FakeLootexClient(HISTORY), store, 137, CONTRACT, '1',
+                                start_time=datetime(2024, 1, 1), end_time=datetime(2024, 1, 3))
+    assert hashes(events) == ['0xb']
+
+def test_second_sync_starts_from_watermark(store):
+    client = FakeLootexClient(HISTORY)
+    sync_lootex_events(client, store, 137, CONTRACT, '1')
+    sync_lootex_events(client, store, 137, CONTRACT, '1')
+
+    assert client.calls[0] is None
+    assert client.calls[1] is not None and client.calls[1] < datetime(2024, 1, 3)
+    assert store.get_watermark('lootex', 137, CONTRACT, '1') == history_event_timestamp(HISTORY[0])
+
+def test_merge_replaces_events_seen_again(store):
+    store.merge('lootex', 137, CONTRACT, '1', HISTORY, history_event_key, history_event_timestamp)
+    store.merge('lootex', 137, CONTRACT, '1', HISTORY[:1], history_event_key, history_event_timestamp)
+    assert len(store.load_events('lootex', 137, CONTRACT, '1')) == len(HISTORY)
+
+def test_partial_crawl_keeps_watermark(store):
+    store.merge('lootex', 137, CONTRACT, '1', HISTORY[1:], history_event_key, history_event_timestamp)
+    store.merge('lootex', 137, CONTRACT, '1', HISTORY[:1], history_event_key, history_event_timestamp, complete=False)
+    assert store.get_watermark('lootex', 137, CONTRACT, '1') == history_event_timestamp(HISTORY[1])
+
+def test_incremental_rejects_async():
+    with pytest.raises(SystemExit):
+        parse_args(['--tokens', 'tokens.csv', '--incremental', '--use-async'])
@@ -47,13 +47,11 @@ def test_lootex_events_with_time_range():
     #         event_time = client.parse_event_time(event)
     #         assert start_time <= event_time <= end_time, f"Event time {event_time} is outside the specified range"
 
-    listing_events = [format_listing_event(e) for e in filtered_events if e['category'] == 'list']
-    cancel_events = [format_cancel_event(e) for e in filtered_events if e['category'] == 'cancel']
-    sale_events = [format_sale_event(e) for e in filtered_events if e['category'] == 'sale']
+    events_by_type = partition_lootex_events(filtered_events)
 
-    print_events(listing_events, "listing")
-    print_events(cancel_events, "cancel")
-    print_events(sale_events, "sale")
+    print_events(events_by_type['listing'], "listing")
+    print_events(events_by_type['cancel'], "cancel")
+    print_events(events_by_type['sale'], "sale")
 
 
 
@@ -119,31 +117,52 @@ def format_sale_event(event):
 #     # print(json.dumps(response, indent=2))
 #     return all_events
 
-def get_lootex_events(chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None):
-    client = LootexClient()
-    return client.get_nft_events(chain_id, contract_address, token_id, limit=limit, start_time=start_time, end_time=end_time)
+def get_lootex_events(chain_id, contract_address, token_id, limit=30, start_time=None, end_time=None, client=None):
+    owns_client = client is None
+    client = client or LootexClient()
+    try:
+        return client.get_nft_events(chain_id, contract_address, token_id, limit=limit, start_time=start_time, end_time=end_time)
+    finally:
+        if owns_client:
+            client.close()
 
 
-def get_lootex_listing_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None):
-    client = LootexClient()
-    start_time = parse_input_time(start_time_str)
-    end_time = parse_input_time(end_time_str)
-    events = client.get_filtered_events(chain_id, contract_address, token_id, start_time, end_time)
-    return [format_listing_event(event) for event in events if event['category'] == 'list']
+LOOTEX_CATEGORY_MAP = {
+    'list': ('listing', format_listing_event),
+    'cancel': ('cancel', format_cancel_event),
+    'sale': ('sale', format_sale_event),
+}
 
-def get_lootex_cancel_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None):
-    client = LootexClient()
+def partition_lootex_events(events):
+    partitioned = {event_type: [] for event_type, _ in LOOTEX_CATEGORY_MAP.values()}
+    for event in events:
+        mapping = LOOTEX_CATEGORY_MAP.get(event.get('category'))
+        if mapping is None:
+            continue
+        event_type, formatter = mapping
+        partitioned[event_type].append(formatter(event))
+    return partitioned
+
+def get_lootex_events_by_type(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
     start_time = parse_input_time(start_time_str)
     end_time = parse_input_time(end_time_str)
-    events = client.get_filtered_events(chain_id, contract_address, token_id, start_time, end_time)
-    return [format_cancel_event(event) for event in events if event['category'] == 'cancel']
+    owns_client = client is None
+    client = client or LootexClient()
+    try:
+        events = client.get_filtered_events(chain_id, contract_address, token_id, start_time, end_time)
+    finally:
+        if owns_client:
+            client.close()
+    return partition_lootex_events(events)
 
-def get_lootex_sale_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None):
-    client = LootexClient()
-    start_time = parse_input_time(start_time_str)
-    end_time = parse_input_time(end_time_str)
-    events = client.get_filtered_events(chain_id, contract_address, token_id, start_time, end_time)
-    return [format_sale_event(event) for event in events if event['category'] == 'sale']
+def get_lootex_listing_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
+    return get_lootex_events_by_type(chain_id, contract_address, token_id, start_time_str, end_time_str, client)['listing']
+
+def get_lootex_cancel_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
+    return get_lootex_events_by_type(chain_id, contract_address, token_id, start_time_str, end_time_str, client)['cancel']
+
+def get_lootex_sale_events(chain_id, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
+    return get_lootex_events_by_type(chain_id, contract_address, token_id, start_time_str, end_time_str, client)['sale']
 
 def print_events(events, event_type):
     print(f"\n--- {event_type.capitalize()} Events ---")
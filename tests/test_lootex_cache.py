@@ -0,0 +1,76 @@
+import sys
+import os
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.lootex_client import LootexClient
+from src.response_cache import ResponseCache
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+
+CACHED_EVENTS = [
+    {'category': 'list', 'hash': '0xa', 'startTime': '2024-01-03T00:00:00.000Z'},
+    {'category': 'list', 'hash': '0xb', 'startTime': '2024-01-02T00:00:00.000Z'},
+    {'category': 'cancel', 'hash': '0xc'},
+    {'category': 'list', 'hash': '0xd', 'startTime': '2023-12-31T00:00:00.000Z'},
+]
+
+def cached_client(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    client = LootexClient(cache=cache)
+    cache.store(client._cache_scope(137, CONTRACT, '1'), None, None, CACHED_EVENTS)
+    return client, cache
+
+def test_cache_hit_without_bounds_keeps_undated_events(tmp_path):
+    client, cache = cached_client(tmp_path)
+    try:
+        events = client.get_nft_events(137, CONTRACT, '1')
+    finally:
+        client.close()
+        cache.close()
+
+    assert [event['hash'] for event in events] == ['0xa', '0xb', '0xc', '0xd']
+
+def test_cache_hit_with_bounds_skips_undated_events(tmp_path):
+    client, cache = cached_client(tmp_path)
+    try:
+        events = client.get_nft_events(137, CONTRACT, '1', start_time=datetime(2024, 1, 1),
+                                       end_time=datetime(2024, 1, 3))
+        open_ended = client.get_nft_events(137, CONTRACT, '1', start_time=datetime(2024, 1, 1))
+    finally:
+        client.close()
+        cache.close()
+
+    # Both bounds are exclusive, like startTimeGt/startTimeLt.
+    assert [event['hash'] for event in events] == ['0xb']
+    assert [event['hash'] for event in open_ended] == ['0xa', '0xb']
+
+def test_stale_open_ended_entry_only_refetches_recent_history(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=600, settle_seconds=3600)
+    client = LootexClient(cache=cache)
+    created_at = time.time() - 7200
+    cache.store(client._cache_scope(137, CONTRACT, '1'), None, None, CACHED_EVENTS, now=created_at)
+
+    recent = {'category': 'sale', 'hash': '0xe', 'startTime': '2024-01-04T00:00:00.000Z'}
+    requests = []
+    def fetch_page(endpoint, params, page):
+        requests.append(params)
+        return [recent], 1
+    client._fetch_page = fetch_page
+
+    try:
+        events = client.get_nft_events(137, CONTRACT, '1')
+        again = client.get_nft_events(137, CONTRACT, '1')
+    finally:
+        client.close()
+        cache.close()
+
+    # Only history newer than the settled part of the stale entry is requested,
+    # and the merged result is stored for the next run.
+    assert len(requests) == 1
+    settled = datetime.fromisoformat(requests[0]['startTimeGt'].replace('Z', '+00:00')).timestamp()
+    assert abs(settled - (created_at - 3600)) < 1
+    assert [event['hash'] for event in events] == ['0xe', '0xa', '0xb', '0xc', '0xd']
+    assert again == events
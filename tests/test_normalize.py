@@ -0,0 +1,99 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.normalize import (
+    EVENT_TYPE_CODES, MISSING_TIME, EventBatch, format_price, format_timestamp, iter_event_batches,
+    normalize_lootex_events, normalize_opensea_events, parse_decimal_price, parse_iso_timestamp
+)
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+NFT = {'collection': 'mock', 'contract': CONTRACT, 'identifier': '1'}
+
+def test_parse_iso_timestamp():
+    assert parse_iso_timestamp('2024-01-01T00:00:00.000Z') == 1704067200
+    assert parse_iso_timestamp('2024-02-29T12:34:56Z') == 1709210096
+    assert parse_iso_timestamp('1969-12-31T23:59:59.000Z') == -1
+    # Anything but the usual shape goes through datetime.
+    assert parse_iso_timestamp('2024-01-01T08:00:00+08:00') == 1704067200
+    assert parse_iso_timestamp(None) == parse_iso_timestamp('N/A') == MISSING_TIME
+
+def test_parse_decimal_price():
+    assert parse_decimal_price('0.015') == (15, 3)
+    assert parse_decimal_price('-1.50') == (-150, 2)
+    assert parse_decimal_price('1E+3') == (1000, 0)
+    assert parse_decimal_price(2) == (2, 0)
+    assert parse_decimal_price(None) == parse_decimal_price('N/A') == parse_decimal_price('abc') == (0, 0)
+
+def test_format_price_and_timestamp():
+    assert format_price(15, 3) == '0.015'
+    assert format_price(-150, 2) == '-1.5'
+    assert format_price(10 ** 18, 18) == '1'
+    assert format_price(7, 0) == '7'
+    assert format_timestamp(1704067200) == '2024-01-01T00:00:00Z'
+    assert format_timestamp(MISSING_TIME) == 'N/A'
+
+def test_normalize_lootex_events():
+    batch = normalize_lootex_events([
+        {'category': 'list', 'hash': '0xorder', 'startTime': '2024-01-01T00:00:00.000Z',
+         'endTime': '2024-01-08T00:00:00.000Z', 'price': '0.5', 'currencySymbol': 'ETH', 'amount': '2',
+         'fromAddress': '0xmaker', 'contractAddress': CONTRACT, 'tokenId': '1', 'collectionName': 'Mock Collection'},
+        {'category': 'sale', 'hash': '0xorder', 'txHash': '0xtx', 'startTime': '2024-01-02T00:00:00.000Z'},
+        {'category': 'cancel', 'hash': '0xcancel'},
+        {'category': 'offer', 'hash': '0xignored'},
+    ])
+
+    assert len(batch) == 3
+    assert list(batch.event_type) == [EVENT_TYPE_CODES['listing'], EVENT_TYPE_CODES['sale'], EVENT_TYPE_CODES['cancel']]
+    # Sales are keyed by transaction hash, orders by order hash.
+    assert batch.txhash == ['0xorder', '0xtx', '0xcancel']
+    assert batch.expiration[0] == 1704672000 and batch.expiration[1] == MISSING_TIME
+    assert (batch.price_raw[0], batch.price_decimals[0], batch.quantity[0]) == (5, 1, 2)
+    assert batch.collection[0] == 'mock-collection' and batch.collection[2] == 'n/a'
+    assert batch.timestamp[2] == MISSING_TIME
+
+def test_normalize_opensea_events():
+    batch = normalize_opensea_events([
+        {'event_type': 'order', 'order_type': 'listing', 'order_hash': '0xorder', 'event_timestamp': 1704067200,
+         'start_date': 1704067100, 'expiration_date': 1704672000, 'maker': '0xmaker', 'quantity': 2,
+         'payment': {'quantity': str(10 ** 18), 'decimals': 18, 'symbol': 'ETH'},
+         'asset': NFT},
+        {'event_type': 'cancel', 'order_type': 'offer', 'order_hash': '0xoffer', 'event_timestamp': 1, 'nft': NFT},
+        {'event_type': 'cancel', 'order_type': 'listing', 'order_hash': '0xcancel', 'event_timestamp': 2, 'nft': NFT},
+        {'event_type': 'transfer', 'transaction': '0xtx', 'event_timestamp': 3, 'from_address': '0xa',
+         'to_address': '0xb', 'quantity': 1, 'nft': NFT},
+        {'event_type': 'transfer', 'transaction': '0xpartial', 'event_timestamp': 4, 'nft': NFT},
+        {'event_type': 'sale', 'transaction': '0xignored'},
+    ])
+
+    assert batch.txhash == ['0xorder', '0xcancel', '0xtx']
+    # Listings use the start date and a per-unit price.
+    assert batch.timestamp[0] == 1704067100
+    assert (batch.price_raw[0], batch.price_decimals[0], batch.quantity[0]) == (5 * 10 ** 17, 18, 2)
+    assert (batch.from_address[2], batch.to_address[2], batch.token_id[2]) == ('0xa', '0xb', '1')
+
+def test_event_batch_indices_and_to_dict():
+    batch = EventBatch('lootex')
+    batch.append(EVENT_TYPE_CODES['sale'], '0x1', 1704067200, quantity=1)
+    batch.append(EVENT_TYPE_CODES['listing'], '0x2', 1704067200, 1704153600, 1500, 3, 'ETH', 1, '0xmaker')
+    batch.append(EVENT_TYPE_CODES['listing'], '0x3', MISSING_TIME)
+
+    assert batch.indices('listing') == [1, 2]
+    assert batch.indices('cancel') == []
+    row = batch.to_dict(1)
+    assert row['event_type'] == 'listing'
+    assert row['price'] == '1.5 ETH'
+    assert row['expiration_time'] == '2024-01-02T00:00:00Z'
+    assert batch.to_dict(2)['created_time'] == 'N/A'
+
+def test_iter_event_batches_chunks_in_order():
+    events = ({'category': 'cancel', 'hash': f"0x{i}"} for i in range(7))
+    chunks = list(iter_event_batches(events, normalize_lootex_events, chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert [txhash for chunk in chunks for txhash in chunk.txhash] == [f"0x{i}" for i in range(7)]
+
+def test_iter_event_batches_skips_empty_chunks():
+    events = [{'category': 'offer'}] * 3 + [{'category': 'cancel', 'hash': '0x1'}]
+    chunks = list(iter_event_batches(events, normalize_lootex_events, chunk_size=3))
+    assert [chunk.txhash for chunk in chunks] == [['0x1']]
@@ -5,7 +5,7 @@ from datetime import datetime, timezone
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.opensea_client import OpenSeaClient
+from src.opensea_client import OpenSeaClient, OPENSEA_QUERY_EVENT_TYPES
 
 def get_user_input():
     chain = input("Enter the chain (e.g., matic): ")
@@ -79,29 +79,61 @@ def format_cancel_event(event):
         'token_id': event['nft']['identifier']
     }
 
-def get_opensea_events(chain, contract_address, token_id, event_types, after=None, before=None):
-    client = OpenSeaClient()
-    events = client.get_nft_events(chain=chain, contract_address=contract_address, token_id=token_id, 
-                                   event_types=event_types, after=after, before=before)
-    return events.get('asset_events', [])
+def get_opensea_events(chain, contract_address, token_id, event_types, after=None, before=None, max_pages=None, max_events=None, client=None):
+    # Lazily follows the `next` cursor, so callers see every page without
+    # holding the whole history in memory.
+    owns_client = client is None
+    client = client or OpenSeaClient()
+    try:
+        yield from client.iter_nft_events(chain=chain, contract_address=contract_address, token_id=token_id,
+                                          event_types=event_types, after=after, before=before,
+                                          max_pages=max_pages, max_events=max_events)
+    finally:
+        if owns_client:
+            client.close()
+
+OPENSEA_EVENT_TYPE_MAP = {
+    'order': ('listing', format_listing_event),
+    'cancel': ('cancel', format_cancel_event),
+    'transfer': ('sale', format_sale_event),
+}
+
+def partition_opensea_events(events):
+    partitioned = {event_type: [] for event_type, _ in OPENSEA_EVENT_TYPE_MAP.values()}
+    for event in events:
+        mapping = OPENSEA_EVENT_TYPE_MAP.get(event.get('event_type'))
+        if mapping is None:
+            continue
+        event_type, formatter = mapping
+        formatted = formatter(event)
+        if formatted is not None:
+            partitioned[event_type].append(formatted)
+    return partitioned
 
-def get_opensea_listing_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None):
+def get_opensea_events_by_type(chain, contract_address, token_id, start_time_str=None, end_time_str=None, max_pages=None, max_events=None, client=None):
     after = parse_input_time(start_time_str)
     before = parse_input_time(end_time_str)
-    events = get_opensea_events(chain, contract_address, token_id, ["listing"], after, before)
-    return [format_listing_event(event) for event in events if event['event_type'] == 'order']
+    events = get_opensea_events(chain, contract_address, token_id, OPENSEA_QUERY_EVENT_TYPES, after, before,
+                                max_pages=max_pages, max_events=max_events, client=client)
+    return partition_opensea_events(events)
 
-def get_opensea_sale_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None):
+def get_opensea_listing_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
     after = parse_input_time(start_time_str)
     before = parse_input_time(end_time_str)
-    events = get_opensea_events(chain, contract_address, token_id, "transfer", after, before)
-    return [event for event in (format_sale_event(event) for event in events) if event is not None]
+    events = get_opensea_events(chain, contract_address, token_id, ["listing"], after, before, client=client)
+    return partition_opensea_events(events)['listing']
 
-def get_opensea_cancel_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None):
+def get_opensea_sale_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
     after = parse_input_time(start_time_str)
     before = parse_input_time(end_time_str)
-    events = get_opensea_events(chain, contract_address, token_id, "cancel", after, before)
-    return [event for event in (format_cancel_event(event) for event in events) if event is not None]
+    events = get_opensea_events(chain, contract_address, token_id, "transfer", after, before, client=client)
+    return partition_opensea_events(events)['sale']
+
+def get_opensea_cancel_events(chain, contract_address, token_id, start_time_str=None, end_time_str=None, client=None):
+    after = parse_input_time(start_time_str)
+    before = parse_input_time(end_time_str)
+    events = get_opensea_events(chain, contract_address, token_id, "cancel", after, before, client=client)
+    return partition_opensea_events(events)['cancel']
 
 def print_events(events, event_type):
     print(f"\n--- {event_type.capitalize()} Events ---")
@@ -118,13 +150,8 @@ if __name__ == "__main__":
     chain, contract_address, token_id, start_time_str, end_time_str = get_user_input()
     print(f"\nFetching events for: Chain: {chain}, Contract: {contract_address}, Token ID: {token_id}")
 
-    after = parse_input_time(start_time_str)
-    before = parse_input_time(end_time_str)
+    events_by_type = get_opensea_events_by_type(chain, contract_address, token_id, start_time_str, end_time_str)
 
-    listing_events = get_opensea_listing_events(chain, contract_address, token_id, after, before)
-    cancel_events = get_opensea_cancel_events(chain, contract_address, token_id, after, before)
-    sale_events = get_opensea_sale_events(chain, contract_address, token_id, after, before)
-    
-    print_events(listing_events, "listing")
-    print_events(cancel_events, "cancel")
-    print_events(sale_events, "sale")
\ No newline at end of file
+    print_events(events_by_type['listing'], "listing")
+    print_events(events_by_type['cancel'], "cancel")
+    print_events(events_by_type['sale'], "sale")
\ No newline at end of file
@@ -0,0 +1,36 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.opensea_client import OpenSeaClient
+from tests.batch_comparator import compare_token_safe, fetch_bulk_events
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+
+class UnindexedOpenSeaClient(OpenSeaClient):
+    # Answers the contract endpoint the way OpenSea does for a contract it
+    # has no collection for.
+    def _get_json(self, url, headers=None, params=None, endpoint=None):
+        return {'address': CONTRACT, 'chain': 'matic', 'collection': None}
+
+class EmptyLootexClient:
+    def get_contract_events(self, chain_id, contract_address, limit=30, start_time=None, end_time=None,
+                            bypass_cache=False):
+        return []
+
+def test_missing_collection_raises():
+    with UnindexedOpenSeaClient(cache=False) as client:
+        with pytest.raises(ValueError):
+            client.get_contract_collection('matic', CONTRACT)
+
+def test_missing_collection_fails_bulk_tokens():
+    token = {'chain': '137', 'contract_address': CONTRACT, 'token_id': '1', 'start_time': None, 'end_time': None}
+    with UnindexedOpenSeaClient(cache=False) as opensea_client:
+        groups = fetch_bulk_events([token], EmptyLootexClient(), opensea_client)
+        result = compare_token_safe(token, None, opensea_client, contract_events=next(iter(groups.values())))
+
+    assert result['status'] == 'error'
+    assert result['error'].startswith('ValueError')
@@ -0,0 +1,67 @@
+import sys
+import os
+import multiprocessing
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.rate_limit import (
+    SharedTokenBucket, TokenBucket, get_rate_limiter, install_rate_limiters, reset_rate_limiters
+)
+
+def test_burst_up_to_capacity_then_wait():
+    bucket = TokenBucket(10, capacity=2)
+    assert bucket._reserve() == 0.0
+    assert bucket._reserve() == 0.0
+    # Each further caller waits one more 1/rate slot.
+    assert 0.09 < bucket._reserve() <= 0.1
+    assert 0.19 < bucket._reserve() <= 0.2
+
+def test_throttling_halves_the_rate_down_to_the_floor():
+    bucket = TokenBucket(16, min_rate=3)
+    bucket.on_throttled()
+    assert bucket.rate == 8
+    assert bucket.tokens <= 0
+    for _ in range(5):
+        bucket.on_throttled()
+    assert bucket.rate == 3
+
+def test_successes_recover_the_rate_up_to_the_ceiling():
+    bucket = TokenBucket(20)
+    bucket.on_throttled()
+    bucket.on_success()
+    assert bucket.rate == 11
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 20
+
+def test_one_bucket_per_host():
+    reset_rate_limiters()
+    try:
+        limiter = get_rate_limiter('https://example.com/a')
+        assert get_rate_limiter('https://example.com/b?page=2') is limiter
+        assert get_rate_limiter('https://example.org/a') is not limiter
+
+        shared = TokenBucket(1)
+        install_rate_limiters({'example.com': shared})
+        assert get_rate_limiter('https://example.com/a') is shared
+    finally:
+        reset_rate_limiters()
+
+def _drain(bucket, count):
+    for _ in range(count):
+        bucket._reserve()
+    bucket.on_throttled()
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_shared_bucket_state_is_seen_by_other_processes():
+    context = multiprocessing.get_context('fork')
+    bucket = SharedTokenBucket(10, capacity=5, context=context)
+    process = context.Process(target=_drain, args=(bucket, 5))
+    process.start()
+    process.join()
+
+    assert process.exitcode == 0
+    assert bucket.rate == 5
+    assert bucket.tokens < 1
@@ -0,0 +1,82 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.normalize import EVENT_TYPE_CODES, MISSING_TIME, EventBatch
+from src.reconcile import Tolerances, _rescale, reconcile
+
+LISTING = EVENT_TYPE_CODES['listing']
+SALE = EVENT_TYPE_CODES['sale']
+
+def listing_batches(lootex_price, opensea_price, lootex_time=1704067200, opensea_time=1704067200):
+    # One listing on each side; prices are (raw, decimals).
+    lootex, opensea = EventBatch('lootex'), EventBatch('opensea')
+    lootex.append(LISTING, '0x1', lootex_time, 1704672000, *lootex_price, 'ETH', 1, '0xMaker')
+    opensea.append(LISTING, '0x1', opensea_time, 1704672000, *opensea_price, 'eth', 1, '0xmaker')
+    return lootex, opensea
+
+def diff_fields(lootex, opensea, event_type='listing', tolerances=None):
+    return [diff.field for diff in reconcile(lootex, opensea, event_type, tolerances).diffs]
+
+def test_rescale_rounds_half_away_from_zero():
+    assert _rescale(15, 1, 0) == 2
+    assert _rescale(14, 1, 0) == 1
+    assert _rescale(-15, 1, 0) == -2
+    assert _rescale(-14, 1, 0) == -1
+    assert _rescale(12345, 3, 6) == 12345000
+    assert _rescale(10 ** 18 + 5 * 10 ** 11, 18, 6) == 1000001
+
+def test_prices_equal_after_rounding():
+    # 0.5 ETH in wei against Lootex's decimal string.
+    assert diff_fields(*listing_batches((5, 1), (5 * 10 ** 17, 18))) == []
+    # 0.1234564 and 0.1234565 round apart at 6 decimals, together at 5.
+    lootex, opensea = listing_batches((1234564, 7), (1234565, 7))
+    assert diff_fields(lootex, opensea) == ['price']
+    assert diff_fields(lootex, opensea, tolerances=Tolerances(price_decimals=5)) == []
+
+def test_timestamp_skew_and_offset():
+    lootex, opensea = listing_batches((1, 0), (1, 0), 1704067200, 1704067203)
+    assert diff_fields(lootex, opensea) == ['timestamp']
+    assert diff_fields(lootex, opensea, tolerances=Tolerances(timestamp_skew=3)) == []
+    assert diff_fields(lootex, opensea, tolerances=Tolerances(timestamp_skew=2)) == ['timestamp']
+
+    lootex, opensea = listing_batches((1, 0), (1, 0), 1704067200 + 8 * 3600, 1704067200)
+    assert diff_fields(lootex, opensea, tolerances=Tolerances(timestamp_offset=8 * 3600)) == ['expiration']
+
+def test_missing_times_are_not_differences():
+    lootex, opensea = listing_batches((1, 0), (1, 0), MISSING_TIME, 1704067200)
+    assert diff_fields(lootex, opensea) == []
+
+def test_missing_prices_are_not_differences():
+    assert diff_fields(*listing_batches((0, 0), (15, 1))) == []
+    assert diff_fields(*listing_batches((15, 1), (0, 0))) == []
+
+def test_unknown_text_and_quantity_are_not_differences():
+    lootex, opensea = EventBatch('lootex'), EventBatch('opensea')
+    lootex.append(SALE, '0xtx', 1704067200, quantity=0, from_address='0xA', to_address=None)
+    opensea.append(SALE, '0xtx', 1704067200, quantity=1, from_address='0xa', to_address='0xb')
+    assert diff_fields(lootex, opensea, 'sale') == []
+
+    opensea.quantity[0], opensea.from_address[0] = 1, '0xc'
+    lootex.quantity[0] = 2
+    assert diff_fields(lootex, opensea, 'sale') == ['quantity', 'from_address']
+
+def test_reconcile_splits_matching_and_unmatched():
+    lootex, opensea = EventBatch('lootex'), EventBatch('opensea')
+    for txhash in ('0x1', '0x2'):
+        lootex.append(LISTING, txhash, 1704067200)
+    for txhash in ('0x2', '0x3'):
+        opensea.append(LISTING, txhash, 1704067200)
+    opensea.append(SALE, '0x1', 1704067200)
+
+    result = reconcile(lootex, opensea, 'listing').to_dict()
+    assert result == {'event_type': 'listing', 'matching': 1, 'lootex_only': ['0x1'], 'opensea_only': ['0x3'],
+                      'field_diffs': []}
+    assert reconcile(lootex, opensea, 'sale').to_dict()['opensea_only'] == ['0x1']
+
+def test_field_diff_values_are_formatted():
+    lootex, opensea = listing_batches((15, 1), (2, 0), 1704067200, 1704070800)
+    diffs = {diff.field: diff.to_dict() for diff in reconcile(lootex, opensea, 'listing').diffs}
+    assert diffs['price']['lootex_value'] == '1.5' and diffs['price']['opensea_value'] == '2'
+    assert diffs['timestamp']['opensea_value'] == '2024-01-01T01:00:00Z'
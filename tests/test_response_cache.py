@@ -0,0 +1,68 @@
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.response_cache import ResponseCache
+
+NOW = 1_700_000_000.0
+EVENTS = [{'hash': '0x1'}, {'hash': '0x2'}]
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=600, max_bytes=1 << 20, settle_seconds=3600)
+    yield cache
+    cache.close()
+
+def test_miss_for_unknown_scope(cache):
+    assert cache.lookup('scope', now=NOW) is None
+
+def test_narrower_window_is_served_from_a_wider_entry(cache):
+    cache.store('scope', 1000, 5000, EVENTS, now=NOW)
+    assert cache.lookup('scope', 2000, 4000, now=NOW) == EVENTS
+    assert cache.lookup('scope', 500, 4000, now=NOW) is None
+    assert cache.lookup('scope', 2000, 6000, now=NOW) is None
+    assert cache.lookup('other', 2000, 4000, now=NOW) is None
+
+def test_open_ended_entry_covers_until_it_expires(cache):
+    cache.store('scope', None, None, EVENTS, now=NOW)
+    assert cache.lookup('scope', now=NOW + 300) == EVENTS
+    # Past the TTL only history that had settled when it was fetched is used.
+    assert cache.lookup('scope', now=NOW + 601) is None
+    assert cache.lookup('scope', 0, NOW - 3600, now=NOW + 601) == EVENTS
+    assert cache.lookup('scope', 0, NOW - 60, now=NOW + 601) is None
+
+def test_stale_open_ended_entry_serves_its_settled_prefix(cache):
+    cache.store('scope', None, None, EVENTS, now=NOW)
+    assert cache.lookup_prefix('scope', now=NOW + 300) == (EVENTS, None)
+    assert cache.lookup_prefix('scope', now=NOW + 601) == (EVENTS, NOW - 3600)
+    assert cache.lookup_prefix('scope', NOW - 60, now=NOW + 601) is None
+
+def test_expired_unsettled_entries_are_dropped(cache):
+    cache.store('scope', NOW - 60, NOW, EVENTS, now=NOW)
+    assert cache.lookup('scope', NOW - 60, NOW, now=NOW + 601) is None
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+
+def test_store_supersedes_contained_windows(cache):
+    cache.store('scope', 2000, 3000, [{'hash': 'old'}], now=NOW)
+    cache.store('scope', 1000, 5000, EVENTS, now=NOW + 1)
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 1
+    assert cache.lookup('scope', 2000, 3000, now=NOW + 2) == EVENTS
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.store('a', 0, 10, EVENTS, now=NOW)
+    size = cache._conn.execute("SELECT size FROM responses").fetchone()[0]
+    cache.max_bytes = 2 * size
+    cache.store('b', 0, 10, EVENTS, now=NOW + 1)
+    assert cache.lookup('a', 0, 10, now=NOW + 2) == EVENTS
+    cache.store('c', 0, 10, EVENTS, now=NOW + 3)
+
+    assert cache.lookup('b', 0, 10, now=NOW + 4) is None
+    assert cache.lookup('a', 0, 10, now=NOW + 4) == cache.lookup('c', 0, 10, now=NOW + 4) == EVENTS
+
+def test_clear(cache):
+    cache.store('scope', 0, 10, EVENTS, now=NOW)
+    cache.clear()
+    assert cache.lookup('scope', 0, 10, now=NOW) is None
@@ -0,0 +1,59 @@
+import sys
+import os
+import csv
+import json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.result_sink import ResultSink, MultiSink, SummaryReport, iter_result_rows, open_sink
+
+TOKEN_RESULT = {
+    'chain': '137',
+    'contract_address': '0xabc',
+    'token_id': '1',
+    'status': 'ok',
+    'results': [
+        {'event_type': 'listing', 'matching': 3, 'lootex_only': ['0x1'], 'opensea_only': [],
+         'field_diffs': [{'txhash': '0x2', 'field': 'price', 'lootex_value': '1.0', 'opensea_value': '1.1'}]},
+        {'event_type': 'sale', 'matching': 1, 'lootex_only': [], 'opensea_only': ['0x3', '0x4']},
+    ],
+}
+
+ERROR_RESULT = {'chain': '137', 'contract_address': '0xabc', 'token_id': '2', 'status': 'error', 'error': 'boom'}
+
+def test_iter_result_rows():
+    rows = list(iter_result_rows(TOKEN_RESULT))
+    assert [row['kind'] for row in rows] == ['lootex_only', 'field_diff', 'opensea_only', 'opensea_only']
+    assert rows[1]['field'] == 'price'
+    assert list(iter_result_rows(ERROR_RESULT)) == [
+        {'chain': '137', 'contract_address': '0xabc', 'token_id': '2', 'kind': 'error', 'error': 'boom'}
+    ]
+
+def test_base_sink_discards_rows():
+    with ResultSink() as sink:
+        sink.write_token(TOKEN_RESULT)
+
+def test_jsonl_and_csv_sinks(tmp_path):
+    jsonl_path, csv_path = str(tmp_path / 'out.jsonl'), str(tmp_path / 'out.csv')
+    with MultiSink([open_sink(jsonl_path), open_sink(csv_path)]) as sink:
+        sink.write_token(TOKEN_RESULT)
+        sink.write_token(ERROR_RESULT)
+
+    with open(jsonl_path) as f:
+        jsonl_rows = [json.loads(line) for line in f]
+    with open(csv_path, newline='') as f:
+        csv_rows = list(csv.DictReader(f))
+    assert len(jsonl_rows) == len(csv_rows) == 5
+    assert jsonl_rows[-1]['error'] == csv_rows[-1]['error'] == 'boom'
+
+def test_summary_report_counts(tmp_path):
+    path = str(tmp_path / 'summary.json')
+    with SummaryReport(path) as report:
+        report.write_token(TOKEN_RESULT)
+        report.write_token(ERROR_RESULT)
+
+    with open(path) as f:
+        summary = json.load(f)
+    assert summary['tokens'] == 2 and summary['errors'] == 1
+    assert summary['by_event_type']['listing'] == {'matching': 3, 'lootex_only': 1, 'opensea_only': 0, 'field_diffs': 1}
+    assert summary['by_event_type']['sale']['opensea_only'] == 2
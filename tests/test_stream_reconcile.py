@@ -0,0 +1,96 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.normalize import (
+    EVENT_TYPES, EVENT_TYPE_CODES, MISSING_TIME, EventBatch, iter_event_batches, normalize_lootex_events,
+    normalize_opensea_events
+)
+from src.reconcile import Tolerances, reconcile, stream_reconcile
+from tests.mock_server import synthetic_events
+
+CONTRACT = '0x0000000000000000000000000000000000000001'
+LISTING = EVENT_TYPE_CODES['listing']
+
+def chunks(source, *pages):
+    # One EventBatch of listings per page of (txhash, timestamp) pairs.
+    batches = []
+    for page in pages:
+        batch = EventBatch(source)
+        for txhash, timestamp in page:
+            batch.append(LISTING, txhash, timestamp)
+        batches.append(batch)
+    return batches
+
+def collect(stream):
+    # The same result shape as reconcile(...).to_dict(), per event type.
+    results = {event_type: {'event_type': event_type, 'matching': 0, 'lootex_only': [], 'opensea_only': [],
+                            'field_diffs': []} for event_type in EVENT_TYPES}
+    for kind, event_type, txhash, diffs in stream:
+        result = results[event_type]
+        if kind == 'matching':
+            result['matching'] += 1
+            result['field_diffs'].extend(diff.to_dict() for diff in diffs)
+        else:
+            result[kind].append(txhash)
+    for result in results.values():
+        result['lootex_only'].sort()
+        result['opensea_only'].sort()
+    return results
+
+def test_unmatched_event_expires_once_the_other_stream_passes_the_window():
+    lootex = chunks('lootex', [('0xa', 100000)], [('0xb', 50000)], [('0xc', 10000)])
+    opensea = chunks('opensea', [('0xb', 50000)], [('0xc', 10000)])
+    yielded = [(kind, txhash) for kind, _, txhash, _ in stream_reconcile(lootex, opensea, window_seconds=1000)]
+
+    assert yielded == [('lootex_only', '0xa'), ('matching', '0xb'), ('matching', '0xc')]
+
+def test_counterparts_within_the_window_still_match():
+    lootex = chunks('lootex', [('0xa', 100000)], [('0xb', 99500)])
+    opensea = chunks('opensea', [('0xb', 99500)], [('0xa', 99400)])
+    results = collect(stream_reconcile(lootex, opensea, window_seconds=1000))['listing']
+
+    assert results['matching'] == 2 and results['lootex_only'] == results['opensea_only'] == []
+
+def test_entries_repeated_across_page_boundaries_are_reported_once():
+    lootex = chunks('lootex', [('0xx', 300), ('0xy', 200), ('0xw', 250)], [('0xy', 200), ('0xw', 250), ('0xz', 100)])
+    opensea = chunks('opensea', [('0xx', 300), ('0xy', 200), ('0xz', 100)])
+    yielded = sorted((kind, txhash) for kind, _, txhash, _ in stream_reconcile(lootex, opensea))
+
+    assert yielded == [('lootex_only', '0xw'), ('matching', '0xx'), ('matching', '0xy'), ('matching', '0xz')]
+
+def test_one_stream_ending_early():
+    lootex = chunks('lootex', [('0xx', 300)], [('0xy', 200)], [('0xz', 100)])
+    opensea = chunks('opensea', [('0xx', 300)])
+    results = collect(stream_reconcile(lootex, opensea, window_seconds=10))['listing']
+
+    assert results['matching'] == 1 and results['lootex_only'] == ['0xy', '0xz'] and results['opensea_only'] == []
+    assert collect(stream_reconcile(opensea, [], window_seconds=10))['listing']['lootex_only'] == ['0xx']
+
+def test_undated_events_are_held_until_the_end():
+    lootex = chunks('lootex', [('0xundated', MISSING_TIME), ('0xa', 100000)], [('0xb', 1000)])
+    opensea = chunks('opensea', [('0xa', 100000)], [('0xb', 1000), ('0xundated', MISSING_TIME)])
+    results = collect(stream_reconcile(lootex, opensea, window_seconds=10))['listing']
+
+    assert results['matching'] == 3
+
+def test_timestamp_offset_moves_the_opensea_stream():
+    lootex = chunks('lootex', [('0xa', 100000 + 8 * 3600)], [('0xb', 50000 + 8 * 3600)])
+    opensea = chunks('opensea', [('0xa', 100000)], [('0xb', 50000)])
+    tolerances = Tolerances(timestamp_offset=8 * 3600)
+    results = collect(stream_reconcile(lootex, opensea, tolerances, window_seconds=10))['listing']
+
+    assert results['matching'] == 2 and results['field_diffs'] == []
+
+def test_streaming_matches_reconcile_on_synthetic_histories():
+    for token_id, chunk_size in ((1, 7), (2, 30), (3, 500)):
+        lootex, opensea = synthetic_events(CONTRACT, token_id, 400, mismatch_rate=0.2, seed=11)
+        lootex = [event for _, event in lootex]
+        opensea = [event for _, event in opensea]
+
+        streamed = collect(stream_reconcile(iter_event_batches(lootex, normalize_lootex_events, chunk_size),
+                                            iter_event_batches(opensea, normalize_opensea_events, chunk_size)))
+        lootex_batch, opensea_batch = normalize_lootex_events(lootex), normalize_opensea_events(opensea)
+        for event_type in EVENT_TYPES:
+            assert streamed[event_type] == reconcile(lootex_batch, opensea_batch, event_type).to_dict()
@@ -0,0 +1,52 @@
+import sys
+import os
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.lootex_client import LootexClient, history_event_key
+from src.opensea_client import OPENSEA_QUERY_EVENT_TYPES, OpenSeaClient, opensea_event_key
+from src.time_windows import MIN_WINDOW_SECONDS, dedupe_windows, split_time_window
+from tests.conftest import MOCK_CONTRACT
+
+def test_split_epoch_range_newest_first():
+    windows = split_time_window(0, 4 * MIN_WINDOW_SECONDS, 4)
+    assert windows == [(3 * MIN_WINDOW_SECONDS, 4 * MIN_WINDOW_SECONDS), (2 * MIN_WINDOW_SECONDS, 3 * MIN_WINDOW_SECONDS),
+                       (MIN_WINDOW_SECONDS, 2 * MIN_WINDOW_SECONDS), (0, MIN_WINDOW_SECONDS)]
+
+def test_split_datetime_range_covers_it_exactly():
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 2, 0, 0, 1)
+    windows = split_time_window(start, end, 3)
+    assert len(windows) == 3
+    assert windows[0][1] == end and windows[-1][0] == start
+    assert all(newer[0] == older[1] for newer, older in zip(windows, windows[1:]))
+    assert all(isinstance(bound, datetime) for window in windows for bound in window)
+
+def test_split_is_skipped_for_open_or_short_ranges():
+    assert split_time_window(None, 10 ** 6, 4) is None
+    assert split_time_window(0, None, 4) is None
+    assert split_time_window(0, 10 ** 6, 1) is None
+    assert split_time_window(0, MIN_WINDOW_SECONDS * 1.5, 4) is None
+    # Capped so that no window is shorter than MIN_WINDOW_SECONDS.
+    assert len(split_time_window(0, MIN_WINDOW_SECONDS * 2.5, 8)) == 2
+
+def test_dedupe_windows_drops_events_seen_on_an_earlier_edge():
+    windows = [[{'id': 3}, {'id': 2}], [{'id': 2}, {'id': 1}], [{'id': 1}, {'id': 1}, {'id': 0}]]
+    unique = list(dedupe_windows(windows, lambda event: event['id']))
+    assert unique == [[{'id': 3}, {'id': 2}], [{'id': 1}], [{'id': 0}]]
+
+def test_sharded_crawls_match_single_crawls_on_the_mock(mock_marketplace):
+    # The synthetic history spans a few days from 2024-01-01.
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 8)
+    with LootexClient(cache=False) as single, LootexClient(cache=False, window_shards=6) as sharded:
+        expected, complete = single.crawl_nft_events('137', MOCK_CONTRACT, '1', start_time=start, end_time=end)
+        events, sharded_complete = sharded.crawl_nft_events('137', MOCK_CONTRACT, '1', start_time=start, end_time=end)
+    assert complete and sharded_complete and expected
+    assert [history_event_key(event) for event in events] == [history_event_key(event) for event in expected]
+
+    after, before = int((start - datetime(1970, 1, 1)).total_seconds()), int((end - datetime(1970, 1, 1)).total_seconds())
+    with OpenSeaClient(cache=False) as single, OpenSeaClient(cache=False, window_shards=6) as sharded:
+        expected = list(single.iter_nft_events('matic', MOCK_CONTRACT, '1', OPENSEA_QUERY_EVENT_TYPES, after, before))
+        events = list(sharded.iter_nft_events('matic', MOCK_CONTRACT, '1', OPENSEA_QUERY_EVENT_TYPES, after, before))
+    assert expected
+    assert [opensea_event_key(event) for event in events] == [opensea_event_key(event) for event in expected]